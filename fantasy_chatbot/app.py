@@ -1,11 +1,9 @@
-import pandas as pd
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.runnables.config import RunnableConfig
 
 import streamlit as st
-from sleeper import SleeperClient
-from league import League
-from typing import Dict, Callable
+from sleeper import SleeperClient, default_client
+from registry import UserLeagueResolver
 import random
 
 import os
@@ -15,20 +13,31 @@ from langgraph.pregel.remote import RemoteGraph
 url_for_langgraph_api = os.environ.get('LANGGRAPH_API_URL', 'http://localhost:8123')
 
 remote_graph = RemoteGraph('chatbot', url=url_for_langgraph_api)
-sleeper = SleeperClient()
-
-def get_tool_name_to_fn(config: RunnableConfig) -> Dict[str, Callable]:
-    league = League(league_id=config['configurable']['league_id'])
-    tool_name_to_fn: Dict[str, Callable] = {
-        'get_player_stats': league.get_player_stats_df,
-        'get_league_status': league.get_league_standings_df,
-        'get_roster_for_team_owner': league.get_roster_for_team_owner_df,
-        'get_player_news': league.get_player_news,
-        'get_player_current_owner': league.get_player_current_owner,
-        'get_best_available_at_position': league.get_best_available_at_position_df,
-        'get_player_rankings': league.get_player_rankings_df,
+
+
+# shared across reruns and sessions, so warm reruns don't touch the network
+@st.cache_resource
+def get_client() -> SleeperClient:
+    return default_client()
+
+
+@st.cache_resource
+def get_user_resolver() -> UserLeagueResolver:
+    return UserLeagueResolver(client=get_client())
+
+
+def add_research(tool_message: dict):
+    """Save a tool result streamed back by the graph to the research sidebar"""
+    if tool_message.get('status') == 'error' or tool_message['tool_call_id'] in st.session_state['research']:
+        return
+    header = tool_message.get('name') or 'research'
+    if args := (tool_message.get('artifact') or {}).get('args'):
+        header += f" ({', '.join(map(str, args.values()))})"
+    st.session_state['research'][tool_message['tool_call_id']] = {
+        'name': header,
+        'content': tool_message['content'],
+        'format': (tool_message.get('artifact') or {}).get('format', 'markdown'),
     }
-    return tool_name_to_fn
 
 def generate_response(message: str, config: RunnableConfig):
     chunks = remote_graph.stream(
@@ -37,33 +46,12 @@ def generate_response(message: str, config: RunnableConfig):
         stream_mode='messages'
     )
     for chunk in chunks:
-        # print(chunk[0])
         if chunk[0].get('type') == 'tool':
             # add to sources on the side
-            continue
+            add_research(chunk[0])
         else:
             yield chunk[0]['content']
 
-def process_tool_calls(config: RunnableConfig):
-    tool_name_to_fn = get_tool_name_to_fn(config)
-
-    messages = remote_graph.get_state(config).values['messages']
-    for m in messages:
-        if tool_calls := m.get('tool_calls', []):
-            for tc in tool_calls:
-                if tc['id'] not in st.session_state['research']:
-                    tc_header = tc['name']
-                    if tc['args']:
-                        tc_header += f" ({', '.join(tc['args'].values())})"
-                    try:
-                        st.session_state['research'][tc['id']] = {
-                            'name': tc_header,
-                            'content': tool_name_to_fn[tc['name']](**tc['args'])
-                        }
-                    except:
-                        # if this tool call fails, don't break everything
-                        continue
-
 def get_random_placeholder():
 
     return random.choice([
@@ -116,8 +104,7 @@ username = st.text_input('Sleeper Username')
 
 if username:
 
-    user_id = sleeper.get_user(username)['user_id']
-    available_leagues = sleeper.get_leagues_for_user(user_id)
+    available_leagues = get_user_resolver().leagues(username)
     league_name_to_id = {league['name']: league['league_id'] for league in available_leagues}
     league_name = st.selectbox('League Name', options=league_name_to_id.keys())
     league_id = league_name_to_id[league_name]
@@ -156,13 +143,13 @@ if username:
                 response = st.write_stream(generate_response(prompt, config))
             # Add assistant response to chat history
             st.session_state.messages.append({"role": "assistant", "content": response})
-            process_tool_calls(config)
-
-            with st.sidebar:
-                st.subheader('Compiled Research')
-                for r in st.session_state.research.values():
-                    with st.expander(r['name']):
-                        if isinstance(r['content'], pd.DataFrame):
-                            st.dataframe(r['content'])
-                        else:
-                            st.markdown(r['content'])
+
+        with st.sidebar:
+            st.subheader('Compiled Research')
+            for r in st.session_state.research.values():
+                with st.expander(r['name']):
+                    if r['format'] == 'markdown':
+                        st.markdown(r['content'])
+                    else:
+                        # csv/tsv tables don't render as markdown
+                        st.text(r['content'])
@@ -0,0 +1,160 @@
+"""
+Latency benchmarks for the league/tool code paths.
+
+Usage: python benchmarks.py <benchmark> [--league-id LEAGUE_ID] [--repeat N] [--cold]
+
+Benchmarks hit the live Sleeper API. With `--cold`, every repetition uses a fresh, empty request cache.
+"""
+import argparse
+import itertools
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from sleeper import SleeperClient
+from league import League
+import config as cf
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], None]] = {}
+
+
+def benchmark(name: str):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def make_client(args: argparse.Namespace) -> SleeperClient:
+    return SleeperClient(cache_path=tempfile.mkdtemp()) if args.cold else SleeperClient()
+
+
+def report(label: str, timings: list[float]):
+    print(f"{label:<40} median {statistics.median(timings) * 1000:9.1f} ms   "
+          f"min {min(timings) * 1000:9.1f} ms   max {max(timings) * 1000:9.1f} ms   (n={len(timings)})")
+
+
+@benchmark('roster_projections')
+def bench_roster_projections(args: argparse.Namespace):
+    """Per-player serial projection fetches (previous behavior) vs the indexed/batched lookup, for every roster"""
+
+    def serial(league: League, player_ids: list[str]):
+        for player_id in player_ids:
+            if player_id not in league.universe:
+                league.client.get_player(player_id)
+            week_projections = league.client.get_player_projections(player_id)
+            (week_projections or {}).get(str(league.week), {})
+
+    def batched(league: League, player_ids: list[str]):
+        league.player_id_to_weekly_projection = {p['player_id']: p for p in league.weekly_projections}
+        league._fetch_many(league.client.get_player, [p for p in player_ids if p not in league.universe])
+        league._get_weekly_projections(player_ids)
+
+    for label, fn in [('serial per-player fetch', serial), ('projection index + batch fallback', batched)]:
+        def run():
+            league = League(args.league_id, client=make_client(args))
+            start = time.perf_counter()
+            for roster in league.user_id_to_roster.values():
+                fn(league, roster['players'])
+            return time.perf_counter() - start
+
+        # only the roster lookups are timed, not the league build
+        report(label, [run() for _ in range(args.repeat)])
+
+
+@benchmark('trade_evaluator')
+def bench_trade_evaluator(args: argparse.Namespace):
+    """evaluate_trade for every pair of teams, each sending its best rest-of-season player"""
+    league = League.build(args.league_id, client=make_client(args))
+
+    start = time.perf_counter()
+    points = league.fantasy_points(league.projection_cube)
+    report('rest-of-season projection cube', [time.perf_counter() - start])
+
+    season_points = points.sum(axis=1)
+    best_players = [season_points.reindex(roster['players']).fillna(0).idxmax()
+                    for roster in league.user_id_to_roster.values() if roster['players']]
+    pairs = list(itertools.combinations(best_players, 2))
+
+    def run():
+        start = time.perf_counter()
+        for give, get in pairs:
+            league._evaluate_trade([give], [get])
+        return time.perf_counter() - start
+
+    report(f'evaluate_trade, {len(pairs)} team pairs', [run() for _ in range(args.repeat)])
+
+
+@benchmark('lineup_solver')
+def bench_lineup_solver(args: argparse.Namespace):
+    """Exact optimal lineups for every roster in the league: per-team calls vs the batched version"""
+    league = League.build(args.league_id, client=make_client(args))
+    # warm the weekly projections and player pool so only the solver is timed
+    league.get_optimal_lineups_df()
+
+    def per_team():
+        start = time.perf_counter()
+        for user_id in league.user_id_to_roster:
+            league.get_optimal_lineup_df(user_id)
+        return time.perf_counter() - start
+
+    def batched():
+        start = time.perf_counter()
+        league.get_optimal_lineups_df()
+        return time.perf_counter() - start
+
+    report(f'per team, {len(league.user_id_to_roster)} rosters', [per_team() for _ in range(args.repeat)])
+    report(f'batched, {len(league.user_id_to_roster)} rosters', [batched() for _ in range(args.repeat)])
+
+
+# run in a fresh interpreter: time the import and count outbound connections made while importing
+IMPORT_PROBE = """
+import json, socket, sys, time
+connections = []
+connect = socket.socket.connect
+def counting_connect(self, address):
+    connections.append(repr(address))
+    return connect(self, address)
+socket.socket.connect = counting_connect
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({'seconds': time.perf_counter() - start, 'connections': connections}))
+"""
+
+
+@benchmark('startup')
+def bench_startup(args: argparse.Namespace):
+    """Import time of the graph module, checked against IMPORT_TIME_BUDGET. Any network I/O at import is a failure"""
+    results = []
+    for _ in range(args.repeat):
+        proc = subprocess.run([sys.executable, '-c', IMPORT_PROBE, args.module], capture_output=True, text=True, check=True)
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    timings = [r['seconds'] for r in results]
+    connections = sorted({c for r in results for c in r['connections']})
+    report(f'import {args.module}', timings)
+
+    failures = []
+    if statistics.median(timings) > cf.IMPORT_TIME_BUDGET:
+        failures.append(f'median import time over budget of {cf.IMPORT_TIME_BUDGET:.1f}s')
+    if connections:
+        failures.append(f'network connections at import: {connections}')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--league-id', default=cf.DEFAULT_LEAGUE_ID)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cold', action='store_true', help='use an empty request cache for every repetition')
+    parser.add_argument('--module', default='chatbot', help='module to import for the startup benchmark')
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
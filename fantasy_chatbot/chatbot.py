@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import TypedDict, Dict, Callable
 from langchain_aws import ChatBedrockConverse
 from langchain_openai import ChatOpenAI
@@ -14,8 +17,13 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.store.memory import InMemoryStore
 from pydantic_core import ValidationError
 
-from sleeper import SleeperClient
 from league import League
+from multi_league import MultiLeague
+from registry import league_registry, user_resolver
+from tool_cache import tool_memo
+from memory_writer import DebouncedMemoryWriter
+from tokens import count_tokens, count_message_tokens, message_text
+from tool_output import record_tokens, tool_output_format
 import config as cf
 from prompts import *
 from graph_config import Configuration
@@ -40,30 +48,44 @@ except ValidationError:
     llm = ChatOpenAI(model="o3-mini", api_key=os.environ.get('OPENAI_API_KEY'), temperature=0)
 
 llm_with_structure = llm.with_structured_output(UserProfile)
+# summaries are state, not part of the answer - keep their tokens out of stream_mode='messages'
+llm_summarizer = llm.with_config(tags=['nostream'])
 
-sleeper = SleeperClient()
-
-def get_tools(league: League = League(cf.DEFAULT_LEAGUE_ID)) -> list[BaseTool]:
+def get_tools(league: League, username: str) -> list[BaseTool]:
+    # cross-league tools cover every league the user is in, not just the selected one
+    multi_league = MultiLeague(username, week=league.week)
     tools = [
         league.get_league_status,
         league.get_roster_for_team_owner,
         league.get_player_news,
+        league.get_players_news,
         league.get_player_stats,
         league.get_player_current_owner,
         league.get_best_available_at_position,
         league.get_player_rankings,
+        league.evaluate_trade,
+        league.get_playoff_odds,
+        league.get_optimal_lineup,
+        league.get_recent_form,
+        league.get_keeper_values,
+        multi_league.get_player_exposure,
+        multi_league.get_best_waiver_adds,
     ]
     return [create_tool(t) for t in tools]
 
 
+def get_league(config: RunnableConfig) -> League:
+    """The selected league, or the user's first league when none was selected"""
+    # the user's leagues are only looked up (and then cached) when no league was selected
+    league_id = user_resolver.league_id(config["configurable"]["username"], config["configurable"].get("league_id"))
+    return league_registry.get(league_id)
+
+
 def assistant(state: SummarizedMessagesState, config: RunnableConfig, store: BaseStore):
 
     # Get the user ID from the config
     username = config["configurable"]["username"]
-    user_leagues = sleeper.get_leagues_for_user(sleeper.get_user(username)['user_id'])
-    league_id = config["configurable"].get("league_id", user_leagues[0]['league_id'])
-
-    league = League(league_id=league_id)
+    league = get_league(config)
 
     # Retrieve memory from the store
     namespace = ("memory", username)
@@ -71,17 +93,45 @@ def assistant(state: SummarizedMessagesState, config: RunnableConfig, store: Bas
 
     memory_value = existing_memory.value if existing_memory else 'No memory found'
 
-    messages = [SystemMessage(ASSISTANT_INSTRUCTION.format(username=username, memory=memory_value))] + state["messages"]
+    system_message = ASSISTANT_INSTRUCTION.format(username=username, memory=memory_value)
+    if summary := state.get("summary"):
+        system_message += SUMMARY_INSTRUCTION.format(summary=summary)
+    messages = [SystemMessage(system_message)] + state["messages"]
 
-    llm_with_tools = llm.bind_tools(get_tools(league))
+    llm_with_tools = llm.bind_tools(get_tools(league, username))
 
     return {"messages": [llm_with_tools.invoke(messages)]}
 
 
+COMPACTED_TAG = '[compacted:'
+
+
+def compact_tool_message(message: ToolMessage) -> ToolMessage:
+    """Replace a tool result with a short digest: its title line plus how much was dropped"""
+    lines = message_text(message).strip().splitlines()
+    table_rows = sum(1 for line in lines if line.startswith('|'))
+    digest = f"{lines[0] if lines else ''} {COMPACTED_TAG} {table_rows or len(lines)} {'table rows' if table_rows else 'lines'}]"
+    # same id, so the add_messages reducer replaces the original in place
+    return ToolMessage(content=digest, tool_call_id=message.tool_call_id, id=message.id, name=message.name,
+                       artifact=message.artifact)
+
+
 def summarize(state: SummarizedMessagesState, config: RunnableConfig, store: BaseStore):
     summary = state.get("summary", "")
+    messages = state["messages"]
+
+    # the current turn (from the latest human message on) is kept verbatim
+    turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+    older, current = messages[:turn_start], messages[turn_start:]
 
-    # Create our summarization prompt
+    # first, cheaply compact old tool tables into digests
+    compacted = [compact_tool_message(m) if isinstance(m, ToolMessage) and COMPACTED_TAG not in message_text(m) else m
+                 for m in older]
+    if not older or count_message_tokens(compacted + current) + count_tokens(summary) <= cf.SUMMARY_TOKEN_BUDGET:
+        # the digests share their originals' ids, so add_messages swaps them in place
+        return {"messages": [c for m, c in zip(older, compacted) if m is not c]}
+
+    # still over budget - fold everything before the current turn into the summary
     if summary:
         # A summary already exists
         summary_message = (
@@ -92,20 +142,14 @@ def summarize(state: SummarizedMessagesState, config: RunnableConfig, store: Bas
     else:
         summary_message = "Create a summary of the conversation above:"
 
-    # Add prompt to our history
-    messages = state["messages"] + [HumanMessage(content=summary_message)]
-    response = llm.invoke(messages)
+    response = llm_summarizer.invoke(compacted + [HumanMessage(content=summary_message)])
 
-    # Delete all but the 2 most recent messages
-    delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
+    delete_messages = [RemoveMessage(id=m.id) for m in older]
     return {"summary": response.content, "messages": delete_messages}
 
 
-def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
-    """Reflect on the chat history and save a memory to the store."""
-
-    # Get the user ID from the config
-    username = config["configurable"]["username"]
+def extract_memory(store: BaseStore, username: str, messages: list):
+    """Reflect on new chat messages and update the user's memory in the store."""
 
     # Retrieve existing memory from the store
     namespace = ("memory", username)
@@ -126,57 +170,122 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
     system_msg = CREATE_MEMORY_INSTRUCTION.format(memory=formatted_memory)
 
     # Invoke the model to produce structured output that matches the schema
-    new_memory = llm_with_structure.invoke([SystemMessage(content=system_msg)] + state['messages'])
+    new_memory = llm_with_structure.invoke([SystemMessage(content=system_msg)] + messages)
 
     # Overwrite the existing use profile memory
     key = "user_memory"
     store.put(namespace, key, new_memory)
 
 
+memory_writer = DebouncedMemoryWriter(extract_memory)
+
+
+def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
+    """Queue a background memory update, so the structured-output LLM call stays off the critical path."""
+    configurable = config["configurable"]
+    memory_writer.schedule(store, configurable["username"], configurable.get("thread_id", ""), state["messages"])
+    return {}
+
+
 def should_summarize(state: SummarizedMessagesState):
     """Return the next node to execute."""
 
-    messages = state["messages"]
-
-    # If there are more than six messages, then we summarize the conversation
-    if len(messages) > 6:
+    # summarize once the prompt we'd resend every turn goes over the token budget
+    if count_message_tokens(state["messages"]) + count_tokens(state.get("summary", "")) > cf.SUMMARY_TOKEN_BUDGET:
         return "summarize"
 
     # Otherwise we can just end
     return END
 
 
+def route_assistant(state: SummarizedMessagesState):
+    """Run requested tools, otherwise finish the turn (summarizing first if the history is over budget)"""
+    if tools_condition(state) == "tools":
+        return "tools"
+    return should_summarize(state)
+
+
+# shared, bounded pool for running the tool calls of one AI message concurrently
+tool_executor = ThreadPoolExecutor(max_workers=cf.TOOL_MAX_WORKERS, thread_name_prefix='tool')
+
+
 def tool_node(state: SummarizedMessagesState, config: RunnableConfig):
     """tools are specific to the league_id"""
-    league = League(config['configurable']['league_id'])
-    tools_by_name = {t.name: t for t in get_tools(league)}
+    league = get_league(config)
+    tools_by_name = {t.name: t for t in get_tools(league, config['configurable']['username'])}
+    tool_calls = state["messages"][-1].tool_calls
+
+    # run every call concurrently, then collect in the original order. each call has its own deadline, counted from
+    # when it starts running (not while queued behind other threads' calls), so a slow or failing tool becomes an
+    # error message without holding up the others. a timed out call can't be interrupted, but every Sleeper request
+    # has its own HTTP_TIMEOUT, so it gives its worker back soon after. waiting in the queue for a worker is bounded
+    # by the same timeout, after which the call is dropped without running
+    # identical calls within a thread are computed once and reused across loop iterations
+    thread_id = config['configurable'].get('thread_id', '')
+    started_at = [0.0] * len(tool_calls)
+    started = [threading.Event() for _ in tool_calls]
+
+    def run(i: int, tool_call: dict):
+        started_at[i] = time.monotonic()
+        started[i].set()
+        tool = tools_by_name[tool_call["name"]]
+        return tool_memo.call(thread_id, league, tool.name, tool_call["args"], lambda **args: tool.invoke(args))
+
+    submitted_at = time.monotonic()
+    futures = [
+        tool_executor.submit(run, i, tc) if tc["name"] in tools_by_name else None
+        for i, tc in enumerate(tool_calls)
+    ]
 
     result = []
-    for tool_call in state["messages"][-1].tool_calls:
-        tool = tools_by_name[tool_call["name"]]
-        observation = tool.invoke(tool_call["args"])
-        result.append(ToolMessage(content=observation, tool_call_id=tool_call["id"]))
+    for i, (tool_call, future) in enumerate(zip(tool_calls, futures)):
+        # name + args let clients (e.g. the app's research sidebar) use streamed results without the original call,
+        # and format tells them how to render it - the client's own config may not match this process's
+        message_fields = {'tool_call_id': tool_call["id"], 'name': tool_call["name"],
+                          'artifact': {'args': tool_call["args"], 'format': tool_output_format(tool_call["name"])}}
+        timeout = cf.TOOL_TIMEOUTS.get(tool_call["name"], cf.TOOL_TIMEOUT)
+        try:
+            if future is None:
+                raise KeyError(f'Unknown tool {tool_call["name"]}')
+            if not started[i].wait(timeout=max(0.0, submitted_at + timeout - time.monotonic())):
+                if future.cancel():
+                    raise FuturesTimeoutError()
+                # it was picked up just now: give it its full running deadline
+                started[i].wait()
+            observation = future.result(timeout=max(0.0, started_at[i] + timeout - time.monotonic()))
+            # memo hits count too: every response is re-sent to the model on each loop iteration
+            tokens = record_tokens(tool_call["name"], str(observation))
+            result.append(ToolMessage(content=observation, response_metadata={'tokens': tokens}, **message_fields))
+        except FuturesTimeoutError:
+            result.append(ToolMessage(content=f'Error: {tool_call["name"]} timed out after {timeout}s',
+                                      status='error', **message_fields))
+        except Exception as e:
+            result.append(ToolMessage(content=f'Error: {tool_call["name"]} failed: {e!r}',
+                                      status='error', **message_fields))
     return {"messages": result}
 
 # Graph
-builder = StateGraph(MessagesState, config_schema=Configuration)
+builder = StateGraph(SummarizedMessagesState, config_schema=Configuration)
 
 # Define nodes: these do the work
 builder.add_node("assistant", assistant)
 builder.add_node("tools", tool_node)
 builder.add_node("write_memory", write_memory)
+builder.add_node("summarize", summarize)
 
 # Define edges: these determine how the control flow moves
 builder.add_edge(START, "assistant")
 builder.add_conditional_edges(
     "assistant",
-    # If the latest message (result) from assistant is a tool call -> tools_condition routes to tools
-    # If the latest message (result) from assistant is a not a tool call -> tools_condition routes to END
-    tools_condition,
+    # If the latest message (result) from assistant is a tool call -> route to tools
+    # Otherwise -> summarize if the history is over the token budget, else END
+    route_assistant,
+    ["tools", "summarize", END],
 )
 builder.add_edge("tools", "assistant")
 builder.add_edge("tools", "write_memory")
 builder.add_edge("write_memory", END)
+builder.add_edge("summarize", END)
 # Store for long-term (across-thread) memory
 across_thread_memory = InMemoryStore()
 
@@ -9,3 +9,108 @@ MODEL_ID_OPENAI = 'gpt-4o'
 
 DEFAULT_USER = 'evandiewald'
 DEFAULT_LEAGUE_ID = '1126330265028108288'
+
+# league snapshot cache
+LEAGUE_CACHE_TTL = int(os.environ.get('LEAGUE_CACHE_TTL', 60 * 15))
+LEAGUE_CACHE_MAX_ENTRIES = int(os.environ.get('LEAGUE_CACHE_MAX_ENTRIES', 32))
+LEAGUE_CACHE_MAX_BYTES = int(os.environ.get('LEAGUE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# username -> user id -> leagues resolution, cached in memory
+USER_LEAGUES_TTL = int(os.environ.get('USER_LEAGUES_TTL', 60 * 60))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+
+# seconds a single Sleeper request may take to connect or to send its next bytes
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))
+# open connections per Sleeper host for the whole process
+SLEEPER_MAX_CONNECTIONS = int(os.environ.get('SLEEPER_MAX_CONNECTIONS', 8))
+
+# max threads used to fan out per-player requests
+MAX_FETCH_WORKERS = int(os.environ.get('MAX_FETCH_WORKERS', 16))
+
+# player name search
+PLAYER_SEARCH_CACHE_SIZE = int(os.environ.get('PLAYER_SEARCH_CACHE_SIZE', 4096))
+
+# shared player universe
+PLAYER_UNIVERSE_REFRESH_INTERVAL = int(os.environ.get('PLAYER_UNIVERSE_REFRESH_INTERVAL', 60 * 60 * 6))
+
+# on-disk league/player snapshots
+SNAPSHOTS_ENABLED = os.environ.get('SNAPSHOTS_ENABLED', 'true').lower() == 'true'
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', '../.cache/snapshots')
+
+# how often the current NFL season/week is re-fetched
+NFL_STATE_REFRESH_INTERVAL = int(os.environ.get('NFL_STATE_REFRESH_INTERVAL', 60 * 5))
+
+# startup benchmark: max seconds to import the graph module
+IMPORT_TIME_BUDGET = float(os.environ.get('IMPORT_TIME_BUDGET', 5.0))
+
+# default result sizes for waiver wire / rankings queries
+WAIVER_RESULTS = int(os.environ.get('WAIVER_RESULTS', 10))
+RANKING_RESULTS = int(os.environ.get('RANKING_RESULTS', 30))
+MULTI_LEAGUE_WAIVER_RESULTS = int(os.environ.get('MULTI_LEAGUE_WAIVER_RESULTS', 3))
+
+# rest-of-season projections: last week of the fantasy season (unless the league says otherwise) and refresh interval
+LAST_FANTASY_WEEK = int(os.environ.get('LAST_FANTASY_WEEK', 17))
+PROJECTION_CUBE_TTL = int(os.environ.get('PROJECTION_CUBE_TTL', 60 * 60))
+
+# seconds before the latest completed week of stats is refetched, for stat corrections
+STATS_CUBE_TTL = int(os.environ.get('STATS_CUBE_TTL', 60 * 30))
+
+# playoff odds simulation: seasons simulated, and weekly score spread used when a team has no history yet
+PLAYOFF_SIMULATIONS = int(os.environ.get('PLAYOFF_SIMULATIONS', 20000))
+PLAYOFF_SCORE_STD = float(os.environ.get('PLAYOFF_SCORE_STD', 25))
+
+# keepers: the round an undrafted keeper costs, and candidates listed per team
+KEEPER_UNDRAFTED_ROUND = int(os.environ.get('KEEPER_UNDRAFTED_ROUND', 8))
+KEEPER_RESULTS = int(os.environ.get('KEEPER_RESULTS', 3))
+
+# how often cached leagues poll for new transactions
+TRANSACTIONS_POLL_INTERVAL = int(os.environ.get('TRANSACTIONS_POLL_INTERVAL', 60 * 2))
+
+# tool execution: concurrent calls per process and per-call timeouts (seconds)
+TOOL_MAX_WORKERS = int(os.environ.get('TOOL_MAX_WORKERS', 8))
+TOOL_TIMEOUT = float(os.environ.get('TOOL_TIMEOUT', 30))
+TOOL_TIMEOUTS = {
+    'get_player_news': 15,
+}
+
+# per-conversation memo of tool results
+TOOL_MEMO_MAX_THREADS = int(os.environ.get('TOOL_MEMO_MAX_THREADS', 256))
+TOOL_MEMO_MAX_ENTRIES = int(os.environ.get('TOOL_MEMO_MAX_ENTRIES', 128))
+
+# seconds player news is reused from memory before being re-requested
+NEWS_CACHE_TTL = int(os.environ.get('NEWS_CACHE_TTL', 60))
+
+# quiet period before a background memory update runs
+MEMORY_DEBOUNCE_SECONDS = float(os.environ.get('MEMORY_DEBOUNCE_SECONDS', 5))
+# idle (username, thread) memory jobs kept, to only extract new messages on the thread's next turn
+MEMORY_MAX_JOBS = int(os.environ.get('MEMORY_MAX_JOBS', 1024))
+
+# conversation summarization
+SUMMARY_TOKEN_BUDGET = int(os.environ.get('SUMMARY_TOKEN_BUDGET', 12000))
+TOKEN_ENCODING = os.environ.get('TOKEN_ENCODING', 'o200k_base')
+CHARS_PER_TOKEN = 4
+
+# how tool tables are rendered for the model: 'markdown', 'csv' or 'tsv'
+TOOL_OUTPUT_FORMAT = os.environ.get('TOOL_OUTPUT_FORMAT', 'markdown')
+# keep only the budgeted columns below and drop empty ones
+TOOL_OUTPUT_PRUNE_COLUMNS = os.environ.get('TOOL_OUTPUT_PRUNE_COLUMNS', 'false').lower() == 'true'
+# per-tool overrides: 'format', 'max_rows' and (when pruning) 'columns'
+TOOL_OUTPUT_BUDGETS = {
+    'get_league_status': {
+        'columns': ['rank', 'team_owner', 'team_name', 'record', 'points_for', 'points_against'],
+    },
+    'get_player_stats': {
+        'max_rows': 18,
+    },
+    'get_player_rankings': {
+        'max_rows': RANKING_RESULTS,
+        'columns': ['name', 'position', 'team', 'pos_rank', 'rank', 'injury_status', 'draft_position'],
+    },
+    'get_roster_for_team_owner': {
+        'columns': ['name', 'position', 'team', 'position_rank', 'is_current_starter', 'projected_points',
+                    'opponent', 'injury_status', 'draft_position'],
+    },
+    'get_best_available_at_position': {
+        'max_rows': WAIVER_RESULTS,
+    },
+}
@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from sleeper import SleeperClient
+import config as cf
+
+
+def _week_frame(rows: list[dict]) -> tuple[pd.DataFrame, pd.Series]:
+    # one row per player: numeric stats, plus the opponent that week
+    rows = [r for r in rows if r.get('player_id')]
+    index = pd.Index([r['player_id'] for r in rows], name='player_id')
+    stats = pd.DataFrame.from_records([r.get('stats') or {} for r in rows], index=index)
+    stats = stats.apply(pd.to_numeric, errors='coerce')
+    opponents = pd.Series([r.get('opponent') for r in rows], index=index, dtype=object)
+    keep = ~index.duplicated()
+    return stats[keep], opponents[keep]
+
+
+class WeeklyCube:
+    """
+    player x week x stat array of Sleeper weekly stats or projections, built from one bulk payload per week.
+
+    Missing values (a player without a row that week, e.g. on bye, or a stat they don't record) are NaN. Cubes are
+    immutable - `extend` returns a new cube, so readers never see a partially updated one.
+    """
+
+    def __init__(self, player_ids: pd.Index, weeks: list[int], stats: pd.Index, values: np.ndarray,
+                 opponents: np.ndarray):
+        self.player_ids = player_ids
+        self.weeks = list(weeks)
+        self.stats = stats
+        self.values = values  # players x weeks x stats
+        self.opponents = opponents  # players x weeks
+
+    @classmethod
+    def from_payloads(cls, payloads: dict[int, list[dict]]) -> 'WeeklyCube':
+        return cls.empty().extend(payloads)
+
+    @classmethod
+    def empty(cls) -> 'WeeklyCube':
+        return cls(pd.Index([], name='player_id'), [], pd.Index([]), np.empty((0, 0, 0), dtype=np.float32),
+                   np.empty((0, 0), dtype=object))
+
+    def extend(self, payloads: dict[int, list[dict]]) -> 'WeeklyCube':
+        """A new cube with the given weeks added (or replaced)"""
+        frames = {int(week): _week_frame(rows or []) for week, rows in payloads.items()}
+        if not frames:
+            return self
+
+        player_ids = self.player_ids.append([s.index for s, _ in frames.values()]).unique().rename('player_id')
+        stats = self.stats.append([s.columns for s, _ in frames.values()]).unique()
+        weeks = sorted(set(self.weeks) | set(frames))
+
+        values = np.full((len(player_ids), len(weeks), len(stats)), np.nan, dtype=np.float32)
+        opponents = np.full((len(player_ids), len(weeks)), None, dtype=object)
+
+        # carry over the existing block
+        if self.values.size:
+            rows, cols = player_ids.get_indexer(self.player_ids), stats.get_indexer(self.stats)
+            week_idx = [weeks.index(w) for w in self.weeks]
+            values[np.ix_(rows, week_idx, cols)] = self.values
+            opponents[np.ix_(rows, week_idx)] = self.opponents
+
+        for week, (week_stats, week_opponents) in frames.items():
+            w = weeks.index(week)
+            rows = player_ids.get_indexer(week_stats.index)
+            values[:, w, :] = np.nan
+            opponents[:, w] = None
+            values[np.ix_(rows, [w], stats.get_indexer(week_stats.columns))] = \
+                week_stats.to_numpy(dtype=np.float32)[:, None, :]
+            opponents[rows, w] = week_opponents.to_numpy()
+
+        return WeeklyCube(player_ids, weeks, stats, values, opponents)
+
+    def stat(self, name: str, player_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """One stat as a players x weeks frame, for all players or the given ones (in that order)"""
+        if name in self.stats:
+            values = self.values[:, :, self.stats.get_loc(name)]
+        else:
+            values = np.full((len(self.player_ids), len(self.weeks)), np.nan, dtype=np.float32)
+        df = pd.DataFrame(values, index=self.player_ids, columns=self.weeks)
+        return df if player_ids is None else df.reindex(list(player_ids))
+
+    def opponent(self, player_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Opponents as a players x weeks frame, for all players or the given ones (in that order)"""
+        df = pd.DataFrame(self.opponents, index=self.player_ids, columns=self.weeks)
+        return df if player_ids is None else df.reindex(list(player_ids))
+
+    def __contains__(self, player_id: str):
+        return player_id in self.player_ids
+
+    def __len__(self):
+        return len(self.player_ids)
+
+
+_projection_cubes: dict[tuple[int, tuple[int, ...]], tuple[float, WeeklyCube]] = {}
+_projection_cubes_lock = threading.Lock()
+
+
+def fetch_weeks(fetch: Callable[[int], list[dict]], weeks: list[int]) -> dict[int, list[dict]]:
+    """Run one bulk per-week request for each week concurrently"""
+    if not weeks:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(weeks), cf.MAX_FETCH_WORKERS)) as executor:
+        return dict(zip(weeks, executor.map(fetch, weeks)))
+
+
+def get_projection_cube(client: SleeperClient, season: int, weeks: Iterable[int]) -> WeeklyCube:
+    """Process-wide projections cube for a season's weeks, refetched after PROJECTION_CUBE_TTL seconds"""
+    key = (int(season), tuple(weeks))
+    with _projection_cubes_lock:
+        entry = _projection_cubes.get(key)
+        if entry is None or time.monotonic() - entry[0] > cf.PROJECTION_CUBE_TTL:
+            payloads = fetch_weeks(lambda week: client.get_all_weekly_projections(season=season, week=week) or [],
+                                   list(key[1]))
+            entry = _projection_cubes[key] = (time.monotonic(), WeeklyCube.from_payloads(payloads))
+    return entry[1]
+
+
+_stats_cubes: dict[int, tuple[float, WeeklyCube]] = {}
+_stats_cubes_lock = threading.Lock()
+
+
+def get_stats_cube(client: SleeperClient, season: int, last_week: int) -> WeeklyCube:
+    """
+    Process-wide stats cube for a season through `last_week`, extended incrementally: only weeks it doesn't have yet
+    are fetched. The latest week is refetched after STATS_CUBE_TTL seconds to pick up stat corrections.
+    """
+    season = int(season)
+    with _stats_cubes_lock:
+        fetched_at, cube = _stats_cubes.get(season, (0.0, WeeklyCube.empty()))
+        weeks = [w for w in range(1, last_week + 1) if w not in cube.weeks]
+        if last_week in cube.weeks and time.monotonic() - fetched_at > cf.STATS_CUBE_TTL:
+            weeks.append(last_week)
+        if weeks:
+            cube = cube.extend(fetch_weeks(lambda week: client.get_all_weekly_stats(season=season, week=week) or [],
+                                           weeks))
+            _stats_cubes[season] = (time.monotonic(), cube)
+    return cube
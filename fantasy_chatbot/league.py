@@ -1,7 +1,19 @@
-from typing import Annotated, TypedDict, Literal, Optional
-from rapidfuzz import process, fuzz
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Any, Callable, TypedDict, Literal, Optional
+import numpy as np
 import pandas as pd
-from sleeper import SleeperClient
+from sleeper import SleeperClient, AsyncSleeperClient, default_client
+from universe import PlayerUniverse, get_player_universe, aget_player_universe
+from player_pool import PlayerPool, weekly_projections_frame
+from tool_output import encode_table
+from cube import WeeklyCube, fetch_weeks, get_projection_cube, get_stats_cube
+from lineup import SLOT_ELIGIBILITY, optimal_lineups, solve_lineup
+from playoffs import simulate_season
+import scoring
+import snapshot
 import config as cf
 
 
@@ -11,26 +23,134 @@ class Lineup(TypedDict):
 
 
 class League:
-    def __init__(self, league_id: str, client: SleeperClient = SleeperClient(), week: Optional[int] = None):
+    # shared/process-local state that is re-attached rather than stored in on-disk snapshots
+    _SNAPSHOT_EXCLUDE = ('client', 'universe', '_player_pool', '_transactions_lock', '_playoff_odds',
+                         '_keeper_values', '_week_projection_cube')
+
+    def __init__(self, league_id: str, client: Optional[SleeperClient] = None, week: Optional[int] = None):
+
+        client = client or default_client()
+        drafts = client.get_league_drafts(league_id)
+        self._index(
+            league_id=league_id,
+            client=client,
+            week=week,
+            nfl_state=client.nfl_state,
+            league=client.get_league(league_id),
+            universe=get_player_universe(client),
+            league_users=client.get_league_users(league_id),
+            rosters=client.get_league_rosters(league_id),
+            matchups=client.get_league_matchups(league_id, week=week),
+            draft_picks=self._get_latest_draft_picks(client, drafts),
+            weekly_projections=client.get_all_weekly_projections(week=week),  # already sorted by projected points
+        )
+
+    @staticmethod
+    def _latest_draft(drafts: list[dict]) -> dict:
+        return sorted(drafts, key=lambda x: x['start_time'], reverse=True)[0]
+
+    @classmethod
+    def _get_latest_draft_picks(cls, client: SleeperClient, drafts: list[dict]) -> list[dict]:
+        draft = cls._latest_draft(drafts)
+        return client.get_draft_picks(draft['draft_id'], complete=draft.get('status') == 'complete')
+
+    @classmethod
+    async def abuild(cls, league_id: str, client: Optional[SleeperClient] = None, week: Optional[int] = None,
+                     aclient: Optional[AsyncSleeperClient] = None) -> 'League':
+        """
+        Build a league by launching all independent fetches concurrently, so a cold build takes roughly as long as
+        the slowest request (plus the drafts -> picks chain) rather than the sum of all of them.
+        `client` is the synchronous client kept on the league for on-demand lookups made by the tools. By default
+        the fetches go through it too, so rebuilds are served from its request cache.
+        """
+        client = client or default_client()
+        aclient = aclient or AsyncSleeperClient(client)
+
+        async def draft_picks():
+            draft = cls._latest_draft(await aclient.get_league_drafts(league_id))
+            return await aclient.get_draft_picks(draft['draft_id'], complete=draft.get('status') == 'complete')
+
+        (nfl_state, league, universe, league_users, rosters, matchups, picks,
+         weekly_projections) = await asyncio.gather(
+            aclient.get_nfl_state(),
+            aclient.get_league(league_id),
+            aget_player_universe(aclient, client),
+            aclient.get_league_users(league_id),
+            aclient.get_league_rosters(league_id),
+            aclient.get_league_matchups(league_id, week=week),
+            draft_picks(),
+            aclient.get_all_weekly_projections(week=week),
+        )
+
+        instance = cls.__new__(cls)
+        instance._index(
+            league_id=league_id,
+            client=client,
+            week=week,
+            nfl_state=nfl_state,
+            league=league,
+            universe=universe,
+            league_users=league_users,
+            rosters=rosters,
+            matchups=matchups,
+            draft_picks=picks,
+            weekly_projections=weekly_projections,
+        )
+        return instance
+
+    @classmethod
+    def from_snapshot(cls, league_id: str, week: int, client: Optional[SleeperClient] = None,
+                      max_age: Optional[float] = cf.LEAGUE_CACHE_TTL) -> Optional['League']:
+        """Restore a league from its on-disk snapshot, or None if there is no snapshot newer than `max_age` seconds"""
+        if (res := snapshot.read_object(snapshot.league_path(league_id, week), max_age=max_age)) is None:
+            return None
+        state, header = res
+        client = client or default_client()
+        instance = cls.__new__(cls)
+        instance.__dict__.update(state)
+        instance._init_runtime_state()
+        # the snapshot may be older than its last sync, so poll for transactions on first use
+        instance.transactions_synced_at = 0.0
+        instance.client = client
+        instance.universe = get_player_universe(client, season=header['season'], scoring=header['scoring'])
+        return instance
+
+    def save_snapshot(self):
+        state = {k: v for k, v in vars(self).items() if k not in self._SNAPSHOT_EXCLUDE}
+        snapshot.write_object(state, snapshot.league_path(self.league_id, self.week),
+                              {'season': self.universe.season, 'scoring': self.universe.scoring})
+
+    @classmethod
+    def build(cls, league_id: str, client: Optional[SleeperClient] = None, week: Optional[int] = None) -> 'League':
+        """Synchronous entrypoint for `abuild`. Falls back to sequential construction inside a running event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(cls.abuild(league_id, client=client, week=week))
+        return cls(league_id, client=client or default_client(), week=week)
+
+    def _index(self, league_id: str, client: SleeperClient, week: Optional[int], nfl_state: dict, league: dict,
+               universe: PlayerUniverse, league_users: list[dict], rosters: list[dict], matchups: list[dict],
+               draft_picks: list[dict], weekly_projections: list[dict]):
 
         self.client = client
         self.league_id = league_id
-        self.week = week or client.nfl_state['display_week']
-        self.league = client.get_league(league_id)
-        self.player_data = client.get_players(limit=None)
+        self.week = week or nfl_state['display_week']
+        self.league = league
+        self.universe = universe
 
         # users in the league
-        self.league_users = client.get_league_users(league_id)
+        self.league_users = league_users
         self.username_to_user_id = {u['display_name']: u['user_id'] for u in self.league_users}
         self.user_id_to_user = {u['user_id']: u for u in self.league_users}
 
         # rosters
-        self.rosters = client.get_league_rosters(league_id)
+        self.rosters = rosters
         self.roster_id_to_user_id = {r['roster_id']: r['owner_id'] for r in self.rosters}
         self.user_id_to_roster_id = {v: k for k, v in self.roster_id_to_user_id.items()}
 
         # matchups are more useful for getting starters by week
-        self.matchups = client.get_league_matchups(league_id, week=week)
+        self.matchups = matchups
 
         # Build user_id_to_roster from rosters instead of matchups to ensure all users are included
         self.user_id_to_roster = {}
@@ -54,58 +174,165 @@ class League:
             for player_id in roster['players']:
                 self.player_id_to_owner[player_id] = self.user_id_to_user[user_id]['display_name']
 
-        # player names/ids
-        self.player_name_to_id: dict[str, str] = {f"{v['first_name']} {v['last_name']}": k for k, v in self.player_data.items()}
-        self.player_names: list[str] = list(self.player_name_to_id.keys())
-
         # draft
         self.player_id_to_draft_position = {}
-        latest_draft_id = sorted(self.client.get_league_drafts(league_id), key=lambda x: x['start_time'], reverse=True)[0]['draft_id']
-        for pick in self.client.get_draft_picks(latest_draft_id):
+        for pick in draft_picks:
             self.player_id_to_draft_position[pick['player_id']] = f"Round {pick['round']} Pick {pick['pick_no']}"
 
-        # waivers - top 10 available at each position by projected points this week
-        self.top_available_by_position = {position: [] for position in cf.POSITIONS}
-        self.weekly_projections = self.client.get_all_weekly_projections(week=week)  # already sorted by projected points
-        for player_proj in self.weekly_projections:
-            # need to check if a player is already on a roster
-            if self.player_id_to_owner.get(player_proj['player_id']):
-                continue
-            position = player_proj['player']['position']
-            if (position not in cf.POSITIONS) or (len(self.top_available_by_position[position]) >= 10):
+        # this week's projections - the payload is already sorted by projected points
+        self.weekly_projections = weekly_projections
+        self.player_id_to_weekly_projection = {p['player_id']: p for p in weekly_projections}
+
+        # bumped whenever rosters change, invalidating anything derived from them
+        self.built_at = time.time()
+        self.roster_version = 0
+
+        # this week's transactions already replayed onto the rosters. the rosters may be older than any of them
+        # (e.g. served stale from the request cache), so every transaction of the week is replayed once
+        self.applied_transaction_ids: set[str] = set()
+        self.transactions_synced_at = time.monotonic()
+
+        self._init_runtime_state()
+
+    def _init_runtime_state(self):
+        # derived/process-local state that is not stored in snapshots
+        self._player_pool: Optional[PlayerPool] = None
+        self._player_pool_version: Optional[tuple[int, int]] = None
+        self._transactions_lock = threading.Lock()
+        self._playoff_odds: dict[tuple, pd.DataFrame] = {}
+        self._keeper_values: dict[tuple, pd.DataFrame] = {}
+        self._week_projection_cube: Optional[WeeklyCube] = None
+
+    @property
+    def version(self) -> tuple:
+        """Identifies the data this league snapshot currently reflects, for keying derived results"""
+        return self.league_id, self.week, self.built_at, self.roster_version, self.universe.version
+
+    @property
+    def scoring_settings(self) -> dict:
+        return self.league.get('scoring_settings') or {}
+
+    def fantasy_points(self, cube: WeeklyCube) -> pd.DataFrame:
+        """players x weeks points of a stats/projections cube under the league's scoring settings"""
+        if self.scoring_settings:
+            return scoring.fantasy_points(cube, self.scoring_settings)
+        # no settings - fall back to the universe's standard scoring type
+        return cube.stat(f'pts_{self.universe.scoring}')
+
+    def _projected_points(self, projection: dict) -> Optional[float]:
+        """Points of one player's weekly projection payload under the league's scoring"""
+        stats = projection.get('stats') or {}
+        if self.scoring_settings:
+            return scoring.score_stats(stats, self.scoring_settings)
+        return stats.get(f'pts_{self.universe.scoring}')
+
+    @property
+    def week_projection_cube(self) -> WeeklyCube:
+        """This week's projections as a cube, from the payload the league was built with"""
+        if self._week_projection_cube is None:
+            self._week_projection_cube = WeeklyCube.from_payloads({self.week: self.weekly_projections})
+        return self._week_projection_cube
+
+    @property
+    def player_pool(self) -> PlayerPool:
+        """Waiver/rankings engine for the current rosters and player universe, rebuilt when either changes"""
+        version = (self.roster_version, self.universe.version)
+        if self._player_pool is None or self._player_pool_version != version:
+            weekly = weekly_projections_frame(self.weekly_projections, self.universe.scoring)
+            season_points = None
+            if self.scoring_settings:
+                # this week's projections and the season's ranks under the league's own scoring
+                week_points = self.fantasy_points(self.week_projection_cube)
+                weekly['projected_points'] = week_points.get(self.week, pd.Series(dtype=float)).reindex(weekly.index)
+                season_points = self.fantasy_points(self.stats_cube).sum(axis=1, min_count=1)
+            self._player_pool = PlayerPool(self.universe, weekly, self.player_id_to_owner.keys(), season_points)
+            self._player_pool_version = version
+        return self._player_pool
+
+    def sync_transactions(self) -> int:
+        """
+        Poll this week's transactions and apply any newly completed adds, drops and trades to the rosters, the
+        ownership index and the available-player pool. Returns the number of transactions applied.
+        """
+        # only one thread syncs at a time - anyone else just keeps reading the current state
+        if not self._transactions_lock.acquire(blocking=False):
+            return 0
+        try:
+            transactions = self.client.get_transactions(self.league_id, week=self.week) or []
+            new_transactions = sorted(
+                (t for t in transactions
+                 if t.get('status') == 'complete'
+                 and t['transaction_id'] not in self.applied_transaction_ids),
+                key=lambda t: t.get('status_updated') or 0
+            )
+            for transaction in new_transactions:
+                self._apply_transaction(transaction)
+                self.applied_transaction_ids.add(transaction['transaction_id'])
+            self.transactions_synced_at = time.monotonic()
+            return len(new_transactions)
+        finally:
+            self._transactions_lock.release()
+
+    def _apply_transaction(self, transaction: dict):
+        # drops first, so a player traded between two rosters ends up on the receiving one. both steps are idempotent,
+        # so replaying a transaction the rosters already reflect changes nothing
+        drops, adds = transaction.get('drops') or {}, transaction.get('adds') or {}
+
+        # copy-on-write: other threads may be iterating over the current indexes, so build new ones and swap them in
+        user_id_to_roster = dict(self.user_id_to_roster)
+        player_id_to_owner = dict(self.player_id_to_owner)
+
+        for player_id, roster_id in drops.items():
+            user_id = self.roster_id_to_user_id.get(roster_id)
+            if roster := user_id_to_roster.get(user_id):
+                user_id_to_roster[user_id] = {
+                    **roster,
+                    'players': [p for p in roster['players'] if p != player_id],
+                    'starters': [p for p in roster['starters'] if p != player_id],
+                }
+            if player_id_to_owner.get(player_id) == self.user_id_to_user.get(user_id, {}).get('display_name'):
+                del player_id_to_owner[player_id]
+
+        for player_id, roster_id in adds.items():
+            user_id = self.roster_id_to_user_id.get(roster_id)
+            if (roster := user_id_to_roster.get(user_id)) is None:
                 continue
+            if player_id not in roster['players']:
+                user_id_to_roster[user_id] = {**roster, 'players': roster['players'] + [player_id]}
+            player_id_to_owner[player_id] = self.user_id_to_user[user_id]['display_name']
 
-            self.top_available_by_position[position].append({
-                'name': f"{player_proj['player']['first_name']} {player_proj['player']['last_name']}",
-                'position': position,
-                'team': player_proj['player']['team'],
-                'opponent': player_proj['opponent'],
-                'projected_points': player_proj['stats']['pts_ppr']
-            })
+        self.user_id_to_roster, self.player_id_to_owner = user_id_to_roster, player_id_to_owner
+
+        # update the pool's rostered mask in place instead of rebuilding it
+        pool_is_current = self._player_pool is not None and self._player_pool_version == (self.roster_version, self.universe.version)
+        self.roster_version += 1
+        if pool_is_current:
+            self._player_pool.set_rostered([p for p in drops if p not in self.player_id_to_owner], False)
+            self._player_pool.set_rostered(list(adds), True)
+            self._player_pool_version = (self.roster_version, self.universe.version)
 
     @classmethod
     def from_user_default_league(cls, username: str):
 
-        client = SleeperClient()
+        client = default_client()
         # have to get the user_id
         user = client.get_user(username)
 
         # default league - if user is in more than one league, you should have them select
         default_league = client.get_leagues_for_user(user['user_id'])[0]
-        return cls(league_id=default_league['league_id'])
+        return cls(league_id=default_league['league_id'], client=client)
 
     def get_lineup_for_owner(self, username: str) -> Lineup:
         roster = self.user_id_to_roster[self.username_to_user_id[username]]
         return {
-            'starters': [self.player_data[player_id] for player_id in roster['starters']],
-            'bench': [self.player_data[player_id] for player_id in
+            'starters': [self.universe.get(player_id) for player_id in roster['starters']],
+            'bench': [self.universe.get(player_id) for player_id in
                       set(roster['players']).difference(roster['starters'])]
         }
 
     def get_player_id_fuzzy_search(self, player_name: str) -> tuple[str, str]:
-        # will need a simple search engine to go from player name to player id without needing exact matches. returns the player_id and matched player name as a tuple
-        nearest_name = process.extract(query=player_name, choices=self.player_names, scorer=fuzz.WRatio, limit=1)[0]
-        return self.player_name_to_id[nearest_name[0]], self.player_names[nearest_name[2]]
+        # go from player name to player id without needing exact matches. returns the player_id and matched player name as a tuple
+        return self.universe.name_index.search(player_name)
 
     def get_player_current_owner(self, player_name: str) -> str:
         """Get a player's current owner. If they are not on a team, they are a free agent"""
@@ -144,27 +371,27 @@ Current NFL Week: {current_week}
 Fantasy Playoffs Start Week: {playoffs_start_week}
 Number of Playoff Teams: {num_playoff_teams} (out of {len(standings_df)})
 Standings:
-{standings_df.to_markdown(index=False)}"""
+{encode_table(standings_df, 'get_league_status')}"""
         return league_status
 
+    @property
+    def stats_cube(self) -> WeeklyCube:
+        """Every player's stats for each completed week of the season, shared by all leagues in the process"""
+        return get_stats_cube(self.client, self.universe.season, self.week - 1)
+
     def get_player_stats_df(self, player_name: Annotated[str, "The player's name."]) -> pd.DataFrame:
         player_id, player_name = self.get_player_id_fuzzy_search(player_name)
-        # stats
-        player_stats = self.client.get_player_stats(player_id, group_by_week=True)
-        weekly_stats = []
-        for week in range(1, self.client.nfl_state['display_week']):
-            stats_for_week = player_stats[str(week)] or {'opponent': None, 'stats': {'pts_ppr': 0}}
-            weekly_stats.append({
-                'week': week,
-                'opponent': stats_for_week['opponent'],
-                'points': stats_for_week['stats'].get('pts_ppr', 0)
-            })
-        return pd.DataFrame(weekly_stats)
+        # served from the season stats cube - weeks without stats (e.g. byes) count as 0 points
+        cube = self.stats_cube
+        weeks = [w for w in cube.weeks if w < self.week]
+        opponents = cube.opponent([player_id]).reindex(columns=weeks).iloc[0]
+        points = self.fantasy_points(cube).reindex(index=[player_id], columns=weeks).iloc[0]
+        return pd.DataFrame({'week': weeks, 'opponent': opponents.to_numpy(), 'points': points.fillna(0).to_numpy()})
 
     def get_player_stats(self, player_name: Annotated[str, "The player's name."]) -> str:
         """Get this year's stats (points per week and opponents) for a player from their name. Returned as a table."""
         stats_df = self.get_player_stats_df(player_name)
-        return f"{self.client.nfl_state['season']} Stats for {player_name}\n" + stats_df.to_markdown(index=False)
+        return f"{self.client.nfl_state['season']} Stats for {player_name}\n" + encode_table(stats_df, 'get_player_stats')
 
     def get_player_news(self, player_name: Annotated[str, "The player's name."]) -> str:
         """
@@ -178,6 +405,23 @@ Standings:
         player_id, player_name = self.get_player_id_fuzzy_search(player_name)
         # news
         news = self.client.get_player_news(player_id, limit=3)
+        return self._format_player_news(player_name, news)
+
+    def get_players_news(self, player_names: Annotated[list[str], "The names of all players to look up."]) -> str:
+        """
+        Get recent news about several players at once, e.g. every player involved in a trade. Prefer this over
+        repeated get_player_news calls whenever you need news for more than one player.
+        If sources are provided, include markdown-based link(s) at the bottom of your response to provide proper
+        attribution and allow the user to learn more.
+        """
+        players = dict(self.get_player_id_fuzzy_search(name) for name in player_names)
+        if not players:
+            return 'No players provided'
+        news = self.client.get_players_news(list(players), limit=3)
+        return '\n\n'.join(self._format_player_news(name, news[player_id]) for player_id, name in players.items())
+
+    @staticmethod
+    def _format_player_news(player_name: str, news: list[dict]) -> str:
         player_news = f"Recent News about {player_name}\n\n"
         for n in news:
             player_news += f"**{n['metadata']['title']}**\n{n['metadata']['description']}"
@@ -197,39 +441,65 @@ Standings:
         player_id, player_name = self.get_player_id_fuzzy_search(player_name)
         return self.player_id_to_draft_position.get(player_id, 'Undrafted')
 
-    def get_player_rankings_df(self, position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None) -> pd.DataFrame:
+    def get_player_rankings_df(self,
+                               position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None,
+                               team: Optional[str] = None,
+                               healthy_only: bool = False) -> pd.DataFrame:
+        top_players = self.player_pool.top_ranked(position, team=team, healthy_only=healthy_only)
+        return pd.DataFrame({
+            'name': top_players['name'],
+            'position': top_players['position'],
+            'team': top_players['team'],
+            'pos_rank': top_players['pos_rank'],
+            'rank': top_players['rank'],
+            'injury_status': top_players['injury_status'],
+            'draft_position': top_players.index.map(lambda p: self.player_id_to_draft_position.get(p, 'Undrafted')),
+        }).reset_index(drop=True)
+
+    def get_player_rankings(self,
+                            position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None,
+                            team: Annotated[Optional[str], "Only include players on this NFL team (abbreviation, e.g. 'KC')."] = None,
+                            healthy_only: Annotated[bool, "Exclude players who are out, doubtful, on IR or suspended."] = False) -> str:
+        """Get scoring rankings for the season so far. Can be broken down by position by providing an optional `position` arg.
+        If `position` is unspecified or null, overall rankings will be returned."""
 
-        players_at_position = filter(lambda x: x['position'] == position, self.player_data.values()) if position else self.player_data.values()
-        sort_key = 'pos_rank_ppr' if position else 'rank_ppr'
+        return f'Rankings so far for position {position or "overall"}\n\n' + encode_table(
+            self.get_player_rankings_df(position, team, healthy_only), 'get_player_rankings')
 
-        player_rankings: list[dict] = []
-        for player in sorted(players_at_position, key=lambda x: x[sort_key])[:30]:
-            player_name = f"{player['first_name']} {player['last_name']}"
-            player_rankings.append({
-                'name': player_name,
-                'position': player['position'],
-                'team': player['team'],
-                'pos_rank_ppr': player['pos_rank_ppr'],
-                'rank_ppr': player['rank_ppr'],
-                'injury_status': player['injury_status'],
-                'draft_position': self.get_player_draft_position(player_name),
-            })
-        return pd.DataFrame(player_rankings).sort_values(sort_key)
+    @staticmethod
+    def _fetch_many(fetch: Callable[[str], Any], player_ids: list[str]) -> dict[str, Any]:
+        """Run a per-player client call for many players in parallel. Failed lookups map to None"""
+        if not player_ids:
+            return {}
 
-    def get_player_rankings(self, position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None) -> str:
-        """Get scoring rankings for the season so far. Can be broken down by position by providing an optional `position` arg.
-        If `position` is unspecified or null, overall rankings will be returned."""
+        def safe_fetch(player_id: str):
+            try:
+                return fetch(player_id)
+            except Exception:
+                return None
 
-        return f'Rankings so far for position {position or "overall"}\n\n' + self.get_player_rankings_df(position).to_markdown(index=False)
+        with ThreadPoolExecutor(max_workers=min(len(player_ids), cf.MAX_FETCH_WORKERS)) as executor:
+            return dict(zip(player_ids, executor.map(safe_fetch, player_ids)))
 
-    def get_roster_for_team_owner_df(self, owner: Annotated[str, "The username or user ID of the team owner."]) -> Optional[pd.DataFrame]:
+    def _get_weekly_projections(self, player_ids: list[str]) -> dict[str, dict]:
+        """This week's projection for each player, from the league-wide payload with a batched per-player fallback"""
+        missing = [p for p in player_ids if p not in self.player_id_to_weekly_projection]
+        for player_id, week_projections in self._fetch_many(self.client.get_player_projections, missing).items():
+            # cache misses too, so players without projections aren't refetched on every call
+            self.player_id_to_weekly_projection[player_id] = (week_projections or {}).get(str(self.week)) or {}
+        return {p: self.player_id_to_weekly_projection[p] for p in player_ids}
+
+    def _owner_user_id(self, owner: str) -> Optional[str]:
         # First try username lookup
         if owner in self.username_to_user_id:
-            user_id = self.username_to_user_id[owner]
+            return self.username_to_user_id[owner]
         # If that fails, check if it's already a user ID
         elif owner in self.user_id_to_user:
-            user_id = owner
-        else:
+            return owner
+        return None
+
+    def get_roster_for_team_owner_df(self, owner: Annotated[str, "The username or user ID of the team owner."]) -> Optional[pd.DataFrame]:
+        if (user_id := self._owner_user_id(owner)) is None:
             return None
 
         # Validate all required user relationships exist
@@ -246,43 +516,33 @@ Standings:
             return None
 
         roster_bench = [p for p in set(roster['players']).difference(roster['starters'])]
+        roster_player_ids = roster['starters'] + roster_bench
 
-        roster_details = []
-        for player_id in roster['starters'] + roster_bench:
-            try:
-                player = self.player_data[player_id]
-            except KeyError:
-                player = self.client.get_player(player_id)
+        # anything outside the league-wide payloads is fetched as one parallel batch
+        players = {player_id: self.universe.get(player_id) for player_id in roster_player_ids}
+        players.update(self._fetch_many(self.client.get_player, [k for k, v in players.items() if v is None]))
+        projections = self._get_weekly_projections(roster_player_ids)
 
+        pool = self.player_pool.table
+        roster_details = []
+        for player_id in roster_player_ids:
+            player = players.get(player_id)
             if not player:
                 continue
 
-            # Safely get projections with error handling
-            try:
-                week_projections = self.client.get_player_projections(player_id)
-                current_week = str(self.client.nfl_state['display_week'])
-                projections = week_projections.get(current_week, {}) if week_projections else {}
-
-                # Safely access nested projection data
-                proj_stats = projections.get('stats', {})
-                projected_points = proj_stats.get('pts_ppr')
-                opponent = projections.get('opponent')
-            except Exception:
-                projected_points = None
-                opponent = None
-
+            projection = projections.get(player_id) or {}
             player_name = f"{player['first_name']} {player['last_name']}"
             roster_details.append({
                 'name': player_name,
                 'position': player['position'],
                 'team': player['team'],
-                'position_rank': player['pos_rank_ppr'],
-                'overall_rank': player['rank_ppr'],
+                'position_rank': pool['pos_rank'].get(player_id, player.get(self.universe.pos_rank_col)),
+                'overall_rank': pool['rank'].get(player_id, player.get(self.universe.rank_col)),
                 'is_current_starter': player_id in roster['starters'],
-                'projected_points': projected_points,  # Using safely accessed value
-                'opponent': opponent,  # Using safely accessed value
+                'projected_points': self._projected_points(projection),
+                'opponent': projection.get('opponent'),
                 'injury_status': player['injury_status'],
-                'draft_position': self.get_player_draft_position(player_name),
+                'draft_position': self.player_id_to_draft_position.get(player_id, 'Undrafted'),
             })
         return pd.DataFrame(roster_details)
 
@@ -290,13 +550,322 @@ Standings:
         """Retrieve roster details for a team based on the owner's username"""
         roster_df = self.get_roster_for_team_owner_df(owner)
         if roster_df is not None:
-            return f'Roster for {owner}:\n\n' + roster_df.to_markdown(index=False)
+            return f'Roster for {owner}:\n\n' + encode_table(roster_df, 'get_roster_for_team_owner')
         else:
             return f'Owner {owner} not found. Available owners: {list(self.username_to_user_id.keys())}'
 
-    def get_best_available_at_position_df(self, position: Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']) -> pd.DataFrame:
-        return pd.DataFrame(self.top_available_by_position[position])
+    def get_best_available_at_position_df(self,
+                                          position: Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+                                          team: Optional[str] = None,
+                                          exclude_bye: bool = False,
+                                          healthy_only: bool = False,
+                                          min_projected_points: Optional[float] = None) -> pd.DataFrame:
+        available = self.player_pool.top_available(position, team=team, exclude_bye=exclude_bye,
+                                                   healthy_only=healthy_only, min_projected_points=min_projected_points)
+        return available[['name', 'position', 'team', 'opponent', 'projected_points']].reset_index(drop=True)
+
+    def get_best_available_at_position(self,
+                                       position: Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+                                       team: Annotated[Optional[str], "Only include players on this NFL team (abbreviation, e.g. 'KC')."] = None,
+                                       exclude_bye: Annotated[bool, "Exclude players whose team is on bye this week."] = False,
+                                       healthy_only: Annotated[bool, "Exclude players who are out, doubtful, on IR or suspended."] = False,
+                                       min_projected_points: Annotated[Optional[float], "Only include players projected for at least this many points."] = None):
+        """Get the top 10 best available players not currently rostered (waiver wire) at a given position based on projected points for the current week.
+        Optionally filter by NFL team, bye week, injury status or a minimum projection."""
+        available_df = self.get_best_available_at_position_df(position, team, exclude_bye, healthy_only,
+                                                              min_projected_points)
+        return encode_table(available_df, 'get_best_available_at_position')
+
+    @property
+    def remaining_weeks(self) -> list[int]:
+        """This week through the last scored week of the fantasy season"""
+        last_week = self.league['settings'].get('last_scored_leg') or cf.LAST_FANTASY_WEEK
+        return list(range(self.week, int(last_week) + 1))
+
+    @property
+    def projection_cube(self) -> WeeklyCube:
+        """Rest-of-season weekly projections for every player, shared by all leagues in the process"""
+        return get_projection_cube(self.client, self.universe.season, self.remaining_weeks)
+
+    def get_rest_of_season_lineup_points(self, player_ids: list[str]) -> np.ndarray:
+        """Points of a roster's optimal starting lineup in each remaining week"""
+        points = self.fantasy_points(self.projection_cube).reindex(player_ids).to_numpy()
+        positions = self.player_pool.table['position'].reindex(player_ids).astype(object).to_numpy()
+        return optimal_lineups(points, positions, self.league['roster_positions'])[0]
+
+    def _evaluate_trade(self, give_ids: list[str], get_ids: list[str]) -> pd.DataFrame:
+        owners = []
+        for side, player_ids in (('give', give_ids), ('get', get_ids)):
+            side_owners = {self.player_id_to_owner.get(p) for p in player_ids}
+            if len(side_owners) != 1 or None in side_owners:
+                raise ValueError(f"Players to {side} must all be rostered by one team, found: {side_owners or 'none'}")
+            owners.append(side_owners.pop())
+        if owners[0] == owners[1]:
+            raise ValueError(f'Both sides of the trade are rostered by {owners[0]}')
+
+        names = self.player_pool.table['name']
+        rows = []
+        for owner, sends, receives in ((owners[0], give_ids, get_ids), (owners[1], get_ids, give_ids)):
+            roster = self.user_id_to_roster[self.username_to_user_id[owner]]['players']
+            before = self.get_rest_of_season_lineup_points(roster)
+            after = self.get_rest_of_season_lineup_points([p for p in roster if p not in sends] + receives)
+            rows.append({
+                'team_owner': owner,
+                'sends': ', '.join(names.get(p, p) for p in sends),
+                'receives': ', '.join(names.get(p, p) for p in receives),
+                'points_before': before.sum(),
+                'points_after': after.sum(),
+                'delta': after.sum() - before.sum(),
+                'weeks_better': int((after > before + 1e-6).sum()),
+                'weeks_worse': int((after < before - 1e-6).sum()),
+            })
+        return pd.DataFrame(rows).round(1)
+
+    def evaluate_trade_df(self, give: list[str], get: list[str]) -> pd.DataFrame:
+        return self._evaluate_trade([self.get_player_id_fuzzy_search(p)[0] for p in give],
+                                    [self.get_player_id_fuzzy_search(p)[0] for p in get])
+
+    def evaluate_trade(self,
+                       give: Annotated[list[str], "Names of the players the first team sends."],
+                       get: Annotated[list[str], "Names of the players the first team receives."]) -> str:
+        """
+        Evaluate a trade between two teams: both teams' best possible starting lineups (for the league's roster
+        slots) are projected for every remaining week of the season, before and after the trade.
+        Returns each team's rest-of-season projected points and the change. Use this before proposing or judging a trade.
+        """
+        if not (weeks := self.remaining_weeks):
+            return 'The fantasy season is over, there are no remaining weeks to evaluate'
+        try:
+            trade_df = self.evaluate_trade_df(give, get)
+        except (KeyError, ValueError) as e:
+            return f'Could not evaluate trade: {e}'
+        return (f'Projected points of optimal lineups for weeks {weeks[0]}-{weeks[-1]}, before and after the trade\n\n'
+                + encode_table(trade_df, 'evaluate_trade'))
+
+    def _team_name(self, roster_id: int) -> str:
+        user = self.user_id_to_user.get(self.roster_id_to_user_id.get(roster_id))
+        return user['display_name'] if user else f'Team {roster_id}'
+
+    def simulate_playoff_odds(self, n_sims: int = cf.PLAYOFF_SIMULATIONS) -> pd.DataFrame:
+        """
+        Playoff, bye and seed probabilities for every team from `n_sims` simulated finishes of the regular season.
+
+        Each team's weekly score is normal around its optimal lineup's projection for that week (its average so far
+        if it has none), with the spread of its scores so far. Results are cached per league snapshot version.
+        """
+        key = (self.version, n_sims)
+        if (cached := self._playoff_odds.get(key)) is not None:
+            return cached
+
+        settings = self.league['settings']
+        playoff_teams, playoff_week_start = settings['playoff_teams'], settings['playoff_week_start']
+        roster_ids = [r['roster_id'] for r in self.rosters]
+        team_idx = {roster_id: i for i, roster_id in enumerate(roster_ids)}
+
+        wins = np.array([r['settings'].get('wins', 0) for r in self.rosters], dtype=float)
+        points_for = np.array([r['settings'].get('fpts', 0) + r['settings'].get('fpts_decimal', 0) / 100
+                               for r in self.rosters])
+
+        matchups = fetch_weeks(lambda week: self.client.get_league_matchups(self.league_id, week=week) or [],
+                               list(range(1, playoff_week_start)))
+
+        # scores so far give each team's spread (and a fallback mean)
+        past = np.full((max(self.week - 1, 0), len(roster_ids)), np.nan)
+        for week in range(1, min(self.week, playoff_week_start)):
+            for m in matchups[week]:
+                if m['roster_id'] in team_idx and m.get('points') is not None:
+                    past[week - 1, team_idx[m['roster_id']]] = m['points']
+        past_mean = np.nan_to_num(np.nanmean(past, axis=0) if len(past) else np.zeros(len(roster_ids)))
+        stds = np.nanstd(past, axis=0) if len(past) > 1 else np.full(len(roster_ids), np.nan)
+        pooled_std = np.nanstd(past) if len(past) > 1 else np.nan
+        stds = np.where(np.isnan(stds) | (stds == 0), pooled_std if pooled_std > 0 else cf.PLAYOFF_SCORE_STD, stds)
+
+        # remaining regular season: pairs of rosters sharing a matchup_id play each other
+        sim_weeks = list(range(self.week, playoff_week_start))
+        games = []
+        for i, week in enumerate(sim_weeks):
+            opponents: dict[int, list[int]] = {}
+            for m in matchups[week]:
+                if m.get('matchup_id') is not None and m['roster_id'] in team_idx:
+                    opponents.setdefault(m['matchup_id'], []).append(team_idx[m['roster_id']])
+            games.extend((i, *pair) for pair in opponents.values() if len(pair) == 2)
+
+        means = np.tile(past_mean, (len(sim_weeks), 1))
+        if sim_weeks:
+            for roster in self.rosters:
+                projected = self.get_rest_of_season_lineup_points(roster['players'] or [])[:len(sim_weeks)]
+                t = team_idx[roster['roster_id']]
+                means[:len(projected), t] = np.where(projected > 0, projected, means[:len(projected), t])
+
+        playoff, bye, seeds = simulate_season(wins, points_for, np.array(games, dtype=int).reshape(-1, 3), means,
+                                              stds, playoff_teams, n_sims)
+
+        odds = pd.DataFrame({
+            'team_owner': [self._team_name(r) for r in roster_ids],
+            'record': [f"{r['settings'].get('wins', 0)}-{r['settings'].get('losses', 0)}" for r in self.rosters],
+            'points_for': points_for.round(1),
+            'playoff_pct': (playoff * 100).round(1),
+            'bye_pct': (bye * 100).round(1),
+            **{f'seed_{i + 1}_pct': (seeds[:, i] * 100).round(1) for i in range(seeds.shape[1])},
+        }).sort_values(['playoff_pct', 'points_for'], ascending=False).reset_index(drop=True)
+        self._playoff_odds[key] = odds
+        return odds
+
+    def get_playoff_odds(self) -> str:
+        """
+        Get every team's chances of making the playoffs, earning a first-round bye and finishing in each playoff seed,
+        from thousands of simulations of the remaining regular season based on projected lineups and scoring so far.
+        """
+        odds_df = self.simulate_playoff_odds()
+        return (f"Playoff odds ({self.league['settings']['playoff_teams']} playoff teams, "
+                f"playoffs start week {self.league['settings']['playoff_week_start']})\n\n"
+                + encode_table(odds_df, 'get_playoff_odds'))
+
+    def _optimal_lineup(self, user_id: str, projections: dict[str, dict]) -> tuple[pd.DataFrame, float, float]:
+        roster = self.user_id_to_roster[user_id]
+        player_ids = list(roster['players'])
+        points = np.array([self._projected_points(projections.get(p) or {}) or 0.0 for p in player_ids], dtype=float)
+        table = self.player_pool.table.reindex(player_ids)
+        slots = [s for s in self.league['roster_positions'] if s in SLOT_ELIGIBILITY]
+        assignment = solve_lineup(points, table['position'].astype(object).to_numpy(), slots)
+
+        lineup = pd.DataFrame({
+            'slot': slots,
+            'name': [table['name'].iloc[i] if i >= 0 else None for i in assignment],
+            'position': [table['position'].iloc[i] if i >= 0 else None for i in assignment],
+            'projected_points': [points[i] if i >= 0 else 0.0 for i in assignment],
+            'currently_starting': [i >= 0 and player_ids[i] in roster['starters'] for i in assignment],
+        })
+        player_points = dict(zip(player_ids, points))
+        current = sum(player_points.get(p, 0.0) for p in roster['starters'])
+        return lineup, current, float(lineup['projected_points'].sum())
+
+    def get_optimal_lineup_df(self, owner: str) -> Optional[tuple[pd.DataFrame, float, float]]:
+        """This week's projection-maximizing lineup for one team, with its current and optimal projected points"""
+        if (user_id := self._owner_user_id(owner)) is None or user_id not in self.user_id_to_roster:
+            return None
+        roster = self.user_id_to_roster[user_id]
+        return self._optimal_lineup(user_id, self._get_weekly_projections(list(roster['players'])))
+
+    def get_optimal_lineups_df(self) -> pd.DataFrame:
+        """Current vs optimal projected points this week for every team, with one batched projections lookup"""
+        projections = self._get_weekly_projections(
+            list({p for roster in self.user_id_to_roster.values() for p in roster['players']}))
+        rows = []
+        for user_id in self.user_id_to_roster:
+            _, current, optimal = self._optimal_lineup(user_id, projections)
+            rows.append({
+                'team_owner': self.user_id_to_user[user_id]['display_name'],
+                'current_points': current,
+                'optimal_points': optimal,
+                'delta': optimal - current,
+            })
+        return pd.DataFrame(rows).round(1).sort_values('delta', ascending=False).reset_index(drop=True)
+
+    def get_optimal_lineup(self, owner: Annotated[str, "The username of the team owner."]) -> str:
+        """
+        Get the lineup that maximizes a team's projected points this week for the league's roster slots
+        (including FLEX/SUPER_FLEX), and how many points it gains over the team's current starters.
+        Use this for start/sit questions.
+        """
+        if (result := self.get_optimal_lineup_df(owner)) is None:
+            return f'Owner {owner} not found. Available owners: {list(self.username_to_user_id.keys())}'
+        lineup_df, current, optimal = result
+        return (f'Optimal lineup for {owner} in week {self.week}: {optimal:.1f} projected points vs {current:.1f} '
+                f'with the current starters ({optimal - current:+.1f})\n\n'
+                + encode_table(lineup_df.round(1), 'get_optimal_lineup'))
+
+    def get_recent_form_df(self,
+                           position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None,
+                           last_n_weeks: int = 3,
+                           n: int = cf.RANKING_RESULTS) -> pd.DataFrame:
+        cube = self.stats_cube
+        points = self.fantasy_points(cube)
+        recent = points[cube.weeks[-last_n_weeks:]]
+        table = self.player_pool.table.reindex(points.index)
+
+        form = pd.DataFrame({
+            'name': table['name'],
+            'position': table['position'],
+            'team': table['team'],
+            'games': recent.notna().sum(axis=1),
+            'avg_recent': recent.mean(axis=1),
+            'avg_season': points.mean(axis=1),
+        })
+        form['trend'] = form['avg_recent'] - form['avg_season']
+        if position:
+            form = form[form['position'] == position]
+        return form.nlargest(n, 'avg_recent').round(1).reset_index(drop=True)
+
+    def get_recent_form(self,
+                        position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None,
+                        last_n_weeks: Annotated[int, "How many of the most recent weeks to average."] = 3) -> str:
+        """
+        Get the players scoring the most points per game over the last few weeks, with their season average and trend
+        (recent average minus season average). Useful for spotting players who are heating up or cooling off.
+        """
+        return (f'Top scorers over the last {last_n_weeks} weeks for position {position or "overall"}\n\n'
+                + encode_table(self.get_recent_form_df(position, last_n_weeks), 'get_recent_form'))
+
+    def keeper_values(self) -> pd.DataFrame:
+        """
+        Keeper candidates on every roster, ranked within each team by surplus value: the player's full-season value
+        (points so far plus rest-of-season projection, under the league's scoring) minus what the pick they would
+        cost typically returns.
 
-    def get_best_available_at_position(self, position: Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']):
-        """Get the top 10 best available players not currently rostered (waiver wire) at a given position based on projected points for the current week"""
-        return self.get_best_available_at_position_df(position).to_markdown(index=False)
+        A keeper costs a pick one round earlier than where they were drafted, round 1 picks can't be kept and
+        undrafted players cost a KEEPER_UNDRAFTED_ROUND pick. A round's typical return is the value of the player
+        ranked at its middle pick. Cached per league snapshot version.
+        """
+        if (cached := self._keeper_values.get(self.version)) is not None:
+            return cached
+
+        player_ids = pd.Index(list(self.player_id_to_owner), name='player_id')
+        season_points = self.fantasy_points(self.stats_cube).sum(axis=1, min_count=1)
+        ros_points = self.fantasy_points(self.projection_cube).sum(axis=1, min_count=1)
+        values = season_points.add(ros_points, fill_value=0)
+
+        draft_positions = pd.Series(self.player_id_to_draft_position, dtype=object).reindex(player_ids)
+        draft_round = draft_positions.str.extract(r'Round (\d+)', expand=False).astype(float)
+        keeper_round = (draft_round - 1).fillna(cf.KEEPER_UNDRAFTED_ROUND)
+
+        # value of the player at the middle pick of each keeper round, from every player's value in descending order
+        n_teams = len(self.rosters)
+        values_by_rank = np.sort(values.dropna().to_numpy())[::-1]
+        pick_idx = ((keeper_round - 1) * n_teams + n_teams // 2).clip(0, max(len(values_by_rank) - 1, 0)).astype(int)
+        pick_value = values_by_rank[pick_idx.to_numpy()] if len(values_by_rank) else np.zeros(len(player_ids))
+
+        table = self.player_pool.table.reindex(player_ids)
+        player_value = values.reindex(player_ids).fillna(0).to_numpy()
+        keepers = pd.DataFrame({
+            'team_owner': [self.player_id_to_owner[p] for p in player_ids],
+            'name': table['name'].to_numpy(),
+            'position': table['position'].to_numpy(),
+            'draft_position': draft_positions.fillna('Undrafted').to_numpy(),
+            'keeper_round': keeper_round.to_numpy(),
+            'season_value': player_value,
+            'pick_value': pick_value,
+            'surplus': player_value - pick_value,
+        })[(draft_round != 1).to_numpy()]
+
+        keepers = keepers.sort_values(['team_owner', 'surplus'], ascending=[True, False])
+        keepers['team_rank'] = keepers.groupby('team_owner').cumcount() + 1
+        keepers = keepers.round(1).reset_index(drop=True)
+        self._keeper_values[self.version] = keepers
+        return keepers
+
+    def get_keeper_values(self,
+                          owner: Annotated[Optional[str], "Only show this team owner's keeper candidates."] = None) -> str:
+        """
+        Get keeper candidates ranked by surplus value: each player's full-season value (points so far plus projected
+        rest of season) against the value of the pick they would cost to keep. One team's full list if `owner` is
+        given, otherwise the best few candidates of every team.
+        """
+        keepers = self.keeper_values()
+        if owner:
+            if owner not in self.username_to_user_id:
+                return f'Owner {owner} not found. Available owners: {list(self.username_to_user_id.keys())}'
+            keepers = keepers[keepers['team_owner'] == owner]
+        else:
+            keepers = keepers[keepers['team_rank'] <= cf.KEEPER_RESULTS]
+        return f'Keeper values for {owner or "every team"}\n\n' + encode_table(keepers, 'get_keeper_values')
@@ -0,0 +1,94 @@
+from typing import Iterable
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+# which player positions can fill each starting slot in a league's roster_positions
+SLOT_ELIGIBILITY: dict[str, frozenset[str]] = {
+    'QB': frozenset({'QB'}),
+    'RB': frozenset({'RB'}),
+    'WR': frozenset({'WR'}),
+    'TE': frozenset({'TE'}),
+    'K': frozenset({'K'}),
+    'DEF': frozenset({'DEF'}),
+    'DL': frozenset({'DL', 'DE', 'DT'}),
+    'LB': frozenset({'LB'}),
+    'DB': frozenset({'DB', 'CB', 'S'}),
+    'WRRB_FLEX': frozenset({'WR', 'RB'}),
+    'REC_FLEX': frozenset({'WR', 'TE'}),
+    'FLEX': frozenset({'RB', 'WR', 'TE'}),
+    'SUPER_FLEX': frozenset({'QB', 'RB', 'WR', 'TE'}),
+    'IDP_FLEX': frozenset({'DL', 'DE', 'DT', 'LB', 'DB', 'CB', 'S'}),
+}
+
+
+# cost of putting a player in a slot they can't fill - higher than any possible gain from projections
+INELIGIBLE_COST = 1e9
+
+
+def starting_slots(roster_positions: Iterable[str]) -> list[str]:
+    """The league's starting slots (bench, IR and taxi slots don't score), most restrictive first"""
+    slots = [s for s in roster_positions if s in SLOT_ELIGIBILITY]
+    return sorted(slots, key=lambda s: len(SLOT_ELIGIBILITY[s]))
+
+
+def is_nested(slots: Iterable[str]) -> bool:
+    """Whether every two slots' eligible positions are either disjoint or one contains the other"""
+    eligibilities = {SLOT_ELIGIBILITY[s] for s in slots if s in SLOT_ELIGIBILITY}
+    return all(a.isdisjoint(b) or a <= b or b <= a for a in eligibilities for b in eligibilities)
+
+
+def solve_lineup(points: np.ndarray, positions: np.ndarray, slots: list[str]) -> np.ndarray:
+    """
+    Exact projection-maximizing lineup for one week, solved as an assignment of players to starting slots.
+
+    `slots` are starting slots only. Returns, for each slot in order, the index of the player filling it, or -1 if no
+    eligible player is left for it.
+    """
+    assignment = np.full(len(slots), -1)
+    if not slots or not len(points):
+        return assignment
+    points = np.nan_to_num(points.astype(float), nan=0.0)
+    eligible = np.stack([np.isin(positions, list(SLOT_ELIGIBILITY[s])) for s in slots], axis=1)  # players x slots
+    players, slot_idx = linear_sum_assignment(np.where(eligible, -points[:, None], INELIGIBLE_COST))
+    filled = eligible[players, slot_idx]
+    assignment[slot_idx[filled]] = players[filled]
+    return assignment
+
+
+def optimal_lineups(points: np.ndarray, positions: np.ndarray, slots: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Projection-maximizing lineup for one roster in every week at once.
+
+    `points` is players x weeks (NaN for no projection, e.g. on bye) and `positions` each player's position. When
+    slot eligibilities are nested (e.g. WR < FLEX < SUPER_FLEX), slots are filled most restrictive first with the
+    best remaining eligible player, vectorized over weeks, which is exact for nested slots. Otherwise (e.g. both
+    WRRB_FLEX and REC_FLEX) each week is solved with `solve_lineup`. Returns the lineup's points per week and a
+    players x weeks mask of starters.
+    """
+    n_players, n_weeks = points.shape
+    points = np.nan_to_num(points.astype(float), nan=0.0)
+    starters = np.zeros((n_players, n_weeks), dtype=bool)
+    totals = np.zeros(n_weeks)
+    if n_players == 0:
+        return totals, starters
+
+    slots = starting_slots(slots)
+    if not is_nested(slots):
+        for week in range(n_weeks):
+            picked = solve_lineup(points[:, week], positions, slots)
+            picked = picked[picked >= 0]
+            starters[picked, week] = True
+            totals[week] = points[picked, week].sum()
+        return totals, starters
+
+    weeks = np.arange(n_weeks)
+    for slot in slots:
+        eligible = np.isin(positions, list(SLOT_ELIGIBILITY[slot]))
+        candidates = np.where(eligible[:, None] & ~starters, points, -np.inf)
+        best = candidates.argmax(axis=0)
+        best_points = candidates[best, weeks]
+        filled = np.isfinite(best_points)
+        totals += np.where(filled, best_points, 0.0)
+        starters[best[filled], weeks[filled]] = True
+    return totals, starters
@@ -0,0 +1,98 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from langchain_core.messages import BaseMessage
+from langgraph.store.base import BaseStore
+
+import config as cf
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _MemoryJob:
+    store: Optional[BaseStore] = None
+    messages: Optional[list[BaseMessage]] = None
+    last_message_id: Optional[str] = None
+    timer: Optional[threading.Timer] = None
+    running: bool = False
+    dirty: bool = False
+
+
+class DebouncedMemoryWriter:
+    """
+    Runs memory extraction in the background, debounced per (username, thread).
+
+    Every `schedule` call restarts a `delay` second timer for its key, so a burst of triggers within one turn
+    coalesces into a single extraction. Each extraction only sees the messages added since the previous one for that
+    key. Triggers that arrive while an extraction is running are folded into one follow-up run.
+
+    Once a key is idle its job drops the messages and store, and only the most recent `max_jobs` idle jobs are kept.
+    """
+
+    def __init__(self, extract: Callable[[BaseStore, str, list[BaseMessage]], Any],
+                 delay: float = cf.MEMORY_DEBOUNCE_SECONDS,
+                 max_jobs: int = cf.MEMORY_MAX_JOBS):
+        self.extract = extract
+        self.delay = delay
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[tuple[str, str], _MemoryJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def schedule(self, store: BaseStore, username: str, thread_id: str, messages: list[BaseMessage]):
+        key = (username, thread_id)
+        with self._lock:
+            job = self._jobs.setdefault(key, _MemoryJob())
+            self._jobs.move_to_end(key)
+            job.store, job.messages = store, messages
+            if job.running:
+                job.dirty = True
+                return
+            self._start_timer(key, job)
+
+    def _start_timer(self, key: tuple[str, str], job: _MemoryJob):
+        if job.timer is not None:
+            job.timer.cancel()
+        job.timer = threading.Timer(self.delay, self._run, args=(key,))
+        job.timer.daemon = True
+        job.timer.start()
+
+    @staticmethod
+    def _new_messages(messages: list[BaseMessage], last_message_id: Optional[str]) -> list[BaseMessage]:
+        ids = [m.id for m in messages]
+        # if the last extracted message is gone (e.g. summarized away), everything left is treated as new
+        if last_message_id in ids:
+            return messages[ids.index(last_message_id) + 1:]
+        return messages
+
+    def _run(self, key: tuple[str, str]):
+        with self._lock:
+            job = self._jobs[key]
+            job.running, job.timer = True, None
+            store, messages, last_message_id = job.store, job.messages, job.last_message_id
+
+        try:
+            if new_messages := self._new_messages(messages, last_message_id):
+                self.extract(store, key[0], new_messages)
+                last_message_id = new_messages[-1].id
+        except Exception:
+            logger.exception('Failed to write memory for %s', key[0])
+        finally:
+            with self._lock:
+                job.running, job.last_message_id = False, last_message_id
+                if job.dirty:
+                    job.dirty = False
+                    self._start_timer(key, job)
+                else:
+                    # nothing pending: don't hold on to the thread's history until its next turn
+                    job.store, job.messages = None, None
+                    self._evict()
+
+    def _evict(self):
+        # least recently scheduled first. jobs that are waiting or running are never evicted
+        idle = [key for key, job in self._jobs.items() if job.timer is None and not job.running]
+        for key in idle[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[key]
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Literal, Optional
+
+import pandas as pd
+
+from league import League
+from registry import LeagueRegistry, UserLeagueResolver, league_registry, user_resolver
+from tool_output import encode_table
+from universe import get_player_universe
+import config as cf
+
+WAIVER_ADD_COLUMNS = ['league', 'name', 'position', 'team', 'opponent', 'projected_points']
+
+
+class MultiLeague:
+    """
+    All of one user's leagues for a week, for answering cross-league questions in one pass.
+
+    Leagues come from the shared LeagueRegistry, so they are the same snapshots single-league conversations use, and
+    all of them reference the one process-wide player universe - only rosters and league indexes are per league.
+    Missing or expired leagues are built concurrently.
+    """
+
+    def __init__(self,
+                 username: str,
+                 week: Optional[int] = None,
+                 registry: LeagueRegistry = league_registry,
+                 resolver: UserLeagueResolver = user_resolver):
+        self.username = username
+        self.week = week
+        self.registry = registry
+        self.resolver = resolver
+
+    @property
+    def user_id(self) -> str:
+        return self.resolver.user_id(self.username)
+
+    @property
+    def leagues(self) -> list[League]:
+        """The user's current leagues, from the registry"""
+        league_ids = [league['league_id'] for league in self.resolver.leagues(self.username)]
+        if not league_ids:
+            return []
+        # load the shared universe up front, so concurrent cold builds don't each fetch their own copy
+        get_player_universe(self.registry.client)
+        with ThreadPoolExecutor(max_workers=min(len(league_ids), cf.MAX_FETCH_WORKERS)) as executor:
+            return list(executor.map(lambda league_id: self.registry.get(league_id, self.week), league_ids))
+
+    def get_player_exposure_df(self, player_id: str, leagues: list[League]) -> pd.DataFrame:
+        user_id = self.user_id
+        exposure = []
+        for league in leagues:
+            my_roster = league.user_id_to_roster.get(user_id) or {'players': [], 'starters': []}
+            owner_id = league.username_to_user_id.get(league.player_id_to_owner.get(player_id))
+            exposure.append({
+                'league': league.league['name'],
+                'on_my_roster': player_id in my_roster['players'],
+                'my_starter': player_id in my_roster['starters'],
+                'owner': league.player_id_to_owner.get(player_id, 'Free Agent'),
+                'owner_starter': owner_id is not None and player_id in league.user_id_to_roster[owner_id]['starters'],
+            })
+        return pd.DataFrame(exposure)
+
+    def get_player_exposure(self, player_name: Annotated[str, "The player's name."]) -> str:
+        """
+        Get the user's exposure to a player across ALL of their leagues: which leagues they roster (and start) the
+        player in, and who owns the player everywhere else.
+        """
+        if not (leagues := self.leagues):
+            return f'No leagues found for {self.username}'
+        # every league shares one player universe, so the name resolves the same everywhere
+        player_id, player_name = leagues[0].get_player_id_fuzzy_search(player_name)
+        exposure_df = self.get_player_exposure_df(player_id, leagues)
+        return (f"{self.username} rosters {player_name} in {int(exposure_df['on_my_roster'].sum())} of "
+                f"{len(exposure_df)} leagues\n\n" + encode_table(exposure_df, 'get_player_exposure'))
+
+    def get_best_waiver_adds_df(self,
+                                position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None,
+                                n: int = cf.MULTI_LEAGUE_WAIVER_RESULTS) -> pd.DataFrame:
+        frames = []
+        for league in self.leagues:
+            available = league.player_pool.top_available(position, n=n, exclude_bye=True, healthy_only=True)
+            frames.append(available.assign(league=league.league['name'])[WAIVER_ADD_COLUMNS])
+        if not frames:
+            return pd.DataFrame(columns=WAIVER_ADD_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def get_best_waiver_adds(self,
+                             position: Optional[Literal['QB', 'RB', 'WR', 'TE', 'K', 'DEF']] = None) -> str:
+        """
+        Get the best available (unrostered, healthy, not on bye) players this week in EACH of the user's leagues,
+        by projected points. Optionally restricted to one position.
+        """
+        return (f"Best waiver adds for {position or 'any position'} across {self.username}'s leagues\n\n"
+                + encode_table(self.get_best_waiver_adds_df(position), 'get_best_waiver_adds'))
@@ -0,0 +1,147 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from rapidfuzz import process, fuzz
+
+import config as cf
+
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# common nicknames -> full (normalized) player names
+NICKNAMES = {
+    'cmc': 'christian mccaffrey',
+    'arsb': 'amon ra st brown',
+    'the sun god': 'amon ra st brown',
+    'hollywood': 'marquise brown',
+    'hollywood brown': 'marquise brown',
+    'jsn': 'jaxon smith njigba',
+    'k9': 'kenneth walker',
+    'kw3': 'kenneth walker',
+    'jjettas': 'justin jefferson',
+    'cheetah': 'tyreek hill',
+    'mhj': 'marvin harrison',
+    'jt': 'jonathan taylor',
+    'tank': 'nathaniel dell',
+    'tank dell': 'nathaniel dell',
+    'hock': 'tj hockenson',
+    'gabe davis': 'gabriel davis',
+    'chig': 'chigoziem okonkwo',
+    'eti': 'travis etienne',
+}
+
+PUNCTUATION = re.compile(r"[.'’`]")
+SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents/punctuation and generational suffixes (Jr., III, ...)"""
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    tokens = SEPARATORS.sub(' ', PUNCTUATION.sub('', name)).split()
+    # never strip the only token (e.g. a single-name query of "V")
+    while len(tokens) > 1 and tokens[-1] in SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+class PlayerNameIndex:
+    """
+    Resolves free-text player names to player ids for one player universe.
+
+    Lookups go through a cheap exact/nickname hash tier, then a prefix/single-name tier, and only then the rapidfuzz
+    scorer. Names may be team-qualified (e.g. "Josh Allen BUF" or "Mike Williams (NYJ)") to disambiguate players
+    with the same name. Resolutions are memoized in a bounded LRU.
+    """
+
+    def __init__(self, players: Iterable[tuple[str, dict]], cache_size: int = cf.PLAYER_SEARCH_CACHE_SIZE):
+        # players should be ordered by relevance (e.g. projected points) - ties on a name resolve to the first one
+        self.player_id_to_name: dict[str, str] = {}
+        self.player_id_to_team: dict[str, Optional[str]] = {}
+        self.key_to_ids: dict[str, list[str]] = {}
+        self.token_to_ids: dict[str, list[str]] = {}
+        self.player_id_to_order: dict[str, int] = {}
+
+        for player_id, player in players:
+            self.player_id_to_order[player_id] = len(self.player_id_to_order)
+            name = f"{player['first_name']} {player['last_name']}"
+            # categorical columns hand back NaN rather than None for free agents
+            team = player.get('team') if isinstance(player.get('team'), str) else None
+            self.player_id_to_name[player_id] = name
+            self.player_id_to_team[player_id] = team
+
+            keys = {normalize_name(name)}
+            if player.get('position') == 'DEF':
+                # team defenses: "Bills", "BUF", "Bills D/ST", "Buffalo defense", ...
+                nickname = normalize_name(player['last_name'])
+                for alias in [nickname, player_id.lower()]:
+                    keys.update({alias, f'{alias} def', f'{alias} dst', f'{alias} defense'})
+            for key in keys:
+                self.key_to_ids.setdefault(key, []).append(player_id)
+            for token in normalize_name(name).split():
+                self.token_to_ids.setdefault(token, []).append(player_id)
+
+        for nickname, full_name in NICKNAMES.items():
+            if full_name in self.key_to_ids:
+                self.key_to_ids.setdefault(nickname, self.key_to_ids[full_name])
+
+        self.teams = {t.lower() for t in self.player_id_to_team.values() if isinstance(t, str)}
+        self.sorted_keys: list[str] = sorted(self.key_to_ids)
+        self.choices: list[str] = list(self.key_to_ids)
+
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _split_team(self, query: str) -> tuple[str, Optional[str]]:
+        tokens = query.split()
+        if len(tokens) > 1 and tokens[-1] in self.teams:
+            return ' '.join(tokens[:-1]), tokens[-1].upper()
+        if len(tokens) > 1 and tokens[0] in self.teams:
+            return ' '.join(tokens[1:]), tokens[0].upper()
+        return query, None
+
+    def _pick(self, player_ids: list[str], team: Optional[str]) -> Optional[str]:
+        if team:
+            player_ids = [p for p in player_ids if self.player_id_to_team[p] == team]
+        return player_ids[0] if player_ids else None
+
+    def _prefix_ids(self, query: str) -> list[str]:
+        player_ids = []
+        for key in self.sorted_keys[bisect_left(self.sorted_keys, query):]:
+            if not key.startswith(query):
+                break
+            player_ids.extend(self.key_to_ids[key])
+        return sorted(set(player_ids), key=self.player_id_to_order.__getitem__)
+
+    def _resolve(self, player_name: str) -> Optional[str]:
+        query = normalize_name(player_name)
+        if not query:
+            return None
+
+        # exact / nickname, with and without a team qualifier
+        if player_id := self._pick(self.key_to_ids.get(query, []), None):
+            return player_id
+        query, team = self._split_team(query)
+        if player_id := self._pick(self.key_to_ids.get(query, []), team):
+            return player_id
+
+        # single first or last name, then prefixes of full names ("justin jeff")
+        if player_id := self._pick(self.token_to_ids.get(query, []), team):
+            return player_id
+        if player_id := self._pick(self._prefix_ids(query), team):
+            return player_id
+
+        # fuzzy, restricted to the team if one was given
+        choices = self.choices
+        if team:
+            choices = [k for k in self.choices if any(self.player_id_to_team[p] == team for p in self.key_to_ids[k])]
+        if match := process.extractOne(query, choices, scorer=fuzz.WRatio, processor=None):
+            return self._pick(self.key_to_ids[match[0]], team)
+        return None
+
+    def search(self, player_name: str) -> tuple[str, str]:
+        """Return the best-matching (player_id, player name). Raises KeyError if nothing matches"""
+        player_id = self.resolve(player_name)
+        if player_id is None:
+            raise KeyError(f'No player found matching {player_name!r}')
+        return player_id, self.player_id_to_name[player_id]
@@ -0,0 +1,130 @@
+from typing import Iterable, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from universe import PlayerUniverse
+import config as cf
+
+INJURED_STATUSES = ['Out', 'Doubtful', 'IR', 'PUP', 'Sus', 'NA']
+
+
+def weekly_projections_frame(weekly_projections: list[dict], scoring: str = 'ppr') -> pd.DataFrame:
+    """This week's projected points, opponent and player metadata, indexed by player_id"""
+    points_col = f'pts_{scoring}'
+    df = pd.DataFrame.from_records([(
+        p['player_id'],
+        p['player'].get('first_name'),
+        p['player'].get('last_name'),
+        p['player'].get('position'),
+        p['player'].get('team'),
+        p['player'].get('injury_status'),
+        (p.get('stats') or {}).get(points_col),
+        p.get('opponent'),
+    ) for p in weekly_projections], columns=['player_id', 'first_name', 'last_name', 'position', 'team',
+                                             'injury_status', 'projected_points', 'opponent'])
+    return df.drop_duplicates('player_id').set_index('player_id')
+
+
+class PlayerPool:
+    """
+    Vectorized waiver-wire and rankings queries over one table of every player: metadata, season ranks and this
+    week's projections, plus a mask of rostered players.
+
+    Every query is a single boolean mask + partial sort over the table. Results are cached per query until the
+    rostered mask changes, either through `set_rostered` deltas or by building a new pool.
+
+    Ranks are the universe's unless `season_points` (e.g. season-to-date points under a league's own scoring) is
+    given, in which case overall and positional ranks are computed from it.
+    """
+
+    def __init__(self, universe: PlayerUniverse, weekly: pd.DataFrame, rostered_player_ids: Iterable[str],
+                 season_points: Optional[pd.Series] = None):
+        players = universe.players
+        ranks = players[[universe.rank_col, universe.pos_rank_col]].set_axis(['rank', 'pos_rank'], axis=1)
+
+        # players can be missing from either side (e.g. no season projection, or no projection this week)
+        meta_cols = ['first_name', 'last_name', 'position', 'team', 'injury_status']
+        table = ranks.join(weekly[['projected_points', 'opponent']], how='outer')
+        meta = players[meta_cols].astype(object).combine_first(weekly[meta_cols].astype(object)).reindex(table.index)
+        table = meta.join(table)
+
+        if season_points is not None:
+            points = season_points.reindex(table.index).astype(float)
+            table['rank'] = points.rank(ascending=False, method='min')
+            table['pos_rank'] = points.groupby(table['position']).rank(ascending=False, method='min')
+
+        table['name'] = table['first_name'].fillna('') + ' ' + table['last_name'].fillna('')
+        table['projected_points'] = table['projected_points'].astype(float)
+        # on bye: plays for a team that has no opponent this week
+        playing_teams = weekly.loc[weekly['opponent'].notna(), 'team'].unique()
+        table['on_bye'] = table['team'].notna() & ~table['team'].isin(playing_teams)
+        table['injured'] = table['injury_status'].isin(INJURED_STATUSES)
+        table['rostered'] = table.index.isin(list(rostered_player_ids))
+
+        self.rank_col, self.pos_rank_col = 'rank', 'pos_rank'
+        self.table = table
+        self._cache: dict[tuple, pd.DataFrame] = {}
+
+    def set_rostered(self, player_ids: list[str], rostered: bool):
+        """Apply a roster delta (adds/drops) to the rostered mask, dropping cached results"""
+        if not player_ids:
+            return
+        table = self.table.copy(deep=False)
+        table['rostered'] = table['rostered'].where(~table.index.isin(player_ids), rostered)
+        # swap in the new table and an empty cache, so concurrent queries see either the old or the new state
+        self.table, self._cache = table, {}
+
+    def _mask(self,
+              position: Optional[str] = None,
+              available: Optional[bool] = None,
+              team: Optional[str] = None,
+              exclude_bye: bool = False,
+              healthy_only: bool = False,
+              min_projected_points: Optional[float] = None) -> np.ndarray:
+        table = self.table
+        mask = np.ones(len(table), dtype=bool)
+        if position:
+            mask &= (table['position'] == position).to_numpy()
+        if available is not None:
+            mask &= ~table['rostered'].to_numpy() if available else table['rostered'].to_numpy()
+        if team:
+            mask &= (table['team'] == team.upper()).to_numpy()
+        if exclude_bye:
+            mask &= ~table['on_bye'].to_numpy()
+        if healthy_only:
+            mask &= ~table['injured'].to_numpy()
+        if min_projected_points is not None:
+            mask &= (table['projected_points'] >= min_projected_points).fillna(False).to_numpy()
+        return mask
+
+    def query(self,
+              sort_by: Literal['projected_points', 'rank'] = 'projected_points',
+              n: int = 10,
+              position: Optional[str] = None,
+              available: Optional[bool] = None,
+              team: Optional[str] = None,
+              exclude_bye: bool = False,
+              healthy_only: bool = False,
+              min_projected_points: Optional[float] = None) -> pd.DataFrame:
+        """Top `n` players matching all filters, by projected points this week (descending) or rank (ascending)"""
+        key = (sort_by, n, position, available, team, exclude_bye, healthy_only, min_projected_points)
+        if (cached := self._cache.get(key)) is not None:
+            return cached
+
+        filtered = self.table[self._mask(position, available, team, exclude_bye, healthy_only, min_projected_points)]
+        if sort_by == 'rank':
+            result = filtered.nsmallest(n, self.pos_rank_col if position else self.rank_col)
+        else:
+            result = filtered.nlargest(n, 'projected_points')
+
+        self._cache[key] = result
+        return result
+
+    def top_available(self, position: Optional[str] = None, n: int = cf.WAIVER_RESULTS, **filters) -> pd.DataFrame:
+        """Best unrostered players by projected points this week"""
+        return self.query('projected_points', n, position=position, available=True, **filters)
+
+    def top_ranked(self, position: Optional[str] = None, n: int = cf.RANKING_RESULTS, **filters) -> pd.DataFrame:
+        """Best players by season-to-date rank, overall or by position"""
+        return self.query('rank', n, position=position, **filters)
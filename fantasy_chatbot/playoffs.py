@@ -0,0 +1,49 @@
+from typing import Optional
+
+import numpy as np
+
+
+def playoff_byes(playoff_teams: int) -> int:
+    """Byes in a single-elimination bracket: teams short of the next power of two skip the first round"""
+    return (1 << max(playoff_teams - 1, 0).bit_length()) - playoff_teams
+
+
+def simulate_season(wins: np.ndarray,
+                    points_for: np.ndarray,
+                    games: np.ndarray,
+                    means: np.ndarray,
+                    stds: np.ndarray,
+                    playoff_teams: int,
+                    n_sims: int,
+                    rng: Optional[np.random.Generator] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Monte Carlo of the rest of the regular season, all simulations at once.
+
+    `wins` and `points_for` are each team's current totals, `games` the remaining schedule as (week, team a, team b)
+    rows, `means` the expected score of each team in each remaining week (weeks x teams) and `stds` each team's
+    weekly score spread. Final standings are ordered by wins, then points for. Returns each team's playoff and bye
+    probability and a teams x playoff_teams matrix of seed probabilities.
+    """
+    rng = rng or np.random.default_rng()
+    n_teams, n_weeks = len(wins), means.shape[0]
+
+    scores = np.maximum(rng.normal(means, stds, size=(n_sims, n_weeks, n_teams)), 0.0)
+    sim_wins = np.broadcast_to(wins.astype(float), (n_sims, n_teams)).copy()
+    if len(games):
+        week, team_a, team_b = games.T
+        a_won = (scores[:, week, team_a] > scores[:, week, team_b]).astype(float)  # sims x games
+        # games x teams incidence matrices turn per-game results into per-team win totals in one matmul
+        a_teams = np.zeros((len(games), n_teams))
+        a_teams[np.arange(len(games)), team_a] = 1.0
+        b_teams = np.zeros((len(games), n_teams))
+        b_teams[np.arange(len(games)), team_b] = 1.0
+        sim_wins += a_won @ a_teams + (1.0 - a_won) @ b_teams
+    sim_points = points_for + scores.sum(axis=1)
+
+    # wins first, points for as the tiebreak (season points never come near the wins multiplier)
+    order = np.argsort(-(sim_wins * 1e6 + sim_points), axis=1)
+    seeds = np.argsort(order, axis=1)  # sims x teams, 0 = first seed
+
+    n_seeds = min(playoff_teams, n_teams)
+    seed_probs = np.stack([(seeds == seed).mean(axis=0) for seed in range(n_seeds)], axis=1)
+    return (seeds < n_seeds).mean(axis=0), (seeds < playoff_byes(playoff_teams)).mean(axis=0), seed_probs
@@ -0,0 +1,243 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sleeper import SleeperClient, default_client
+from league import League
+import config as cf
+
+
+def _approx_size(obj, seen: Optional[set] = None) -> int:
+    """Rough recursive size in bytes of a json-like object graph (dicts, lists, tuples, sets, scalars)"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(v, seen) for v in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += _approx_size(vars(obj), seen)
+    return size
+
+
+def league_size(league: League) -> int:
+    # the shared client and player universe are not owned by the snapshot, so don't count them against the cap
+    return _approx_size({k: v for k, v in vars(league).items() if k not in ('client', 'universe')})
+
+
+@dataclass
+class _Entry:
+    league: League
+    built_at: float
+    size: int
+
+
+class LeagueRegistry:
+    """
+    Process-wide cache of League snapshots keyed by (league_id, week).
+
+    Snapshots are built once and shared between graph nodes and threads, so callers must treat them as read-only.
+    Between rebuilds they are kept current by applying new transactions (see `League.sync_transactions`) at most every
+    `transactions_poll_interval` seconds. Entries are rebuilt after `ttl` seconds, the least recently used entries are
+    evicted once `max_entries` or `max_bytes` is exceeded, and concurrent requests for a key that is being built wait
+    on that single build.
+    """
+
+    def __init__(self,
+                 client: Optional[SleeperClient] = None,
+                 ttl: float = cf.LEAGUE_CACHE_TTL,
+                 max_entries: int = cf.LEAGUE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = cf.LEAGUE_CACHE_MAX_BYTES,
+                 transactions_poll_interval: float = cf.TRANSACTIONS_POLL_INTERVAL,
+                 builder: Optional[Callable[[str, int], League]] = None,
+                 sizeof: Callable[[League], int] = league_size):
+        self._client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.transactions_poll_interval = transactions_poll_interval
+        self.builder = builder or self._build
+        self.sizeof = sizeof
+
+        self._entries: OrderedDict[tuple[str, int], _Entry] = OrderedDict()
+        self._inflight: dict[tuple[str, int], Future] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+
+    @property
+    def client(self) -> SleeperClient:
+        if self._client is None:
+            self._client = default_client()
+        return self._client
+
+    def _build(self, league_id: str, week: int) -> League:
+        # prefer a fresh on-disk snapshot (e.g. pre-warmed by `python snapshot.py`) over hitting the API
+        if league := League.from_snapshot(league_id, week, client=self.client, max_age=self.ttl):
+            return league
+        league = League.build(league_id, client=self.client, week=week)
+        league.save_snapshot()
+        return league
+
+    def _key(self, league_id: str, week: Optional[int]) -> tuple[str, int]:
+        return str(league_id), int(week or self.client.nfl_state['display_week'])
+
+    def get(self, league_id: str, week: Optional[int] = None) -> League:
+        """Get the snapshot for a league/week, building it if it is missing or expired"""
+        key = self._key(league_id, week)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry.built_at < self.ttl:
+                self._entries.move_to_end(key)
+                league = entry.league
+            else:
+                league = None
+
+            # single-flight: only the first caller builds, everyone else waits on its future
+            if league is None:
+                future = self._inflight.get(key)
+                is_builder = future is None
+                if is_builder:
+                    future = self._inflight[key] = Future()
+
+        if league is not None:
+            # keep long-lived snapshots current with a small transactions request instead of a rebuild
+            if time.monotonic() - league.transactions_synced_at > self.transactions_poll_interval:
+                league.sync_transactions()
+            return league
+
+        if not is_builder:
+            return future.result()
+
+        try:
+            league = self.builder(*key)
+            size = self.sizeof(league)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = _Entry(league=league, built_at=time.monotonic(), size=size)
+            self.total_bytes += size
+            self._evict()
+            del self._inflight[key]
+        future.set_result(league)
+        return league
+
+    def invalidate(self, league_id: str, week: Optional[int] = None):
+        """Drop cached snapshots for a league - a specific week if provided, otherwise all weeks"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == str(league_id) and (week is None or k[1] == int(week))]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _discard(self, key: tuple[str, int]):
+        if entry := self._entries.pop(key, None):
+            self.total_bytes -= entry.size
+
+    def _evict(self):
+        # always keep the most recent entry, even if it alone is over the byte cap
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: tuple[str, int]):
+        return key in self._entries
+
+
+class UserLeagueResolver:
+    """
+    Process-wide cache of username -> user_id -> leagues, so working out who a user is and which league they mean
+    costs no network calls on warm turns.
+
+    User ids never change, so they are kept until evicted (least recently used beyond `max_entries`). League lists
+    are refetched after `ttl` seconds to pick up newly joined leagues.
+    """
+
+    def __init__(self,
+                 client: Optional[SleeperClient] = None,
+                 ttl: float = cf.USER_LEAGUES_TTL,
+                 max_entries: int = cf.USER_CACHE_MAX_ENTRIES):
+        self._client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._user_ids: OrderedDict[str, str] = OrderedDict()
+        self._leagues: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> SleeperClient:
+        if self._client is None:
+            self._client = default_client()
+        return self._client
+
+    def _put(self, cache: OrderedDict, key: str, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def user_id(self, username: str) -> str:
+        # sleeper usernames are case-insensitive
+        key = username.strip().lower()
+        with self._lock:
+            if (user_id := self._user_ids.get(key)) is not None:
+                self._user_ids.move_to_end(key)
+                return user_id
+
+        user = self.client.get_user(key)
+        if not user:
+            raise KeyError(f'Sleeper user {username} not found')
+        self._put(self._user_ids, key, user['user_id'])
+        return user['user_id']
+
+    def leagues(self, username: str) -> list[dict]:
+        """The user's leagues for the current season"""
+        user_id = self.user_id(username)
+        with self._lock:
+            entry = self._leagues.get(user_id)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._leagues.move_to_end(user_id)
+                return entry[1]
+
+        leagues = self.client.get_leagues_for_user(user_id) or []
+        self._put(self._leagues, user_id, (time.monotonic(), leagues))
+        return leagues
+
+    def league_id(self, username: str, league_id: Optional[str] = None) -> str:
+        """`league_id` if provided, otherwise the user's first league - only then are the user's leagues looked up"""
+        if league_id:
+            return league_id
+        if not (leagues := self.leagues(username)):
+            raise KeyError(f'No leagues found for {username}')
+        return leagues[0]['league_id']
+
+    def invalidate(self, username: str):
+        key = username.strip().lower()
+        with self._lock:
+            if (user_id := self._user_ids.pop(key, None)) is not None:
+                self._leagues.pop(user_id, None)
+
+
+league_registry = LeagueRegistry()
+user_resolver = UserLeagueResolver()
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import threading
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+import numpy as np
+import pandas as pd
+
+from cube import WeeklyCube
+
+# cube -> scoring settings hash -> players x weeks points. cubes are immutable, so entries live as long as the cube
+_points_cache: 'WeakKeyDictionary[WeeklyCube, dict[str, pd.DataFrame]]' = WeakKeyDictionary()
+_points_cache_lock = threading.Lock()
+
+
+def settings_hash(scoring_settings: dict) -> str:
+    return hashlib.sha1(json.dumps(scoring_settings, sort_keys=True).encode()).hexdigest()
+
+
+def stat_weights(stats: pd.Index, scoring_settings: dict) -> np.ndarray:
+    """Points per unit of each stat, aligned with `stats` - stats the league doesn't score weigh 0"""
+    return np.array([float(scoring_settings.get(stat) or 0.0) for stat in stats], dtype=np.float32)
+
+
+def score_stats(stats: Optional[dict], scoring_settings: dict) -> Optional[float]:
+    """Fantasy points of a single stat line (e.g. one player's projection for a week)"""
+    if not stats:
+        return None
+    return float(sum(float(value or 0.0) * float(scoring_settings[stat])
+                     for stat, value in stats.items() if scoring_settings.get(stat) and isinstance(value, (int, float))))
+
+
+def fantasy_points(cube: WeeklyCube, scoring_settings: dict) -> pd.DataFrame:
+    """
+    Fantasy points of every player in every week of a cube under a league's scoring settings, as one
+    (players * weeks) x stats by stats matrix multiply. Players without a row in a week stay NaN.
+
+    Cached per cube and settings hash, so leagues with identical scoring rules share the work.
+    """
+    key = settings_hash(scoring_settings)
+    with _points_cache_lock:
+        if (cached := _points_cache.get(cube, {}).get(key)) is not None:
+            return cached
+
+    n_players, n_weeks, n_stats = cube.values.shape
+    has_row = ~np.isnan(cube.values).all(axis=2) if n_stats else np.zeros((n_players, n_weeks), dtype=bool)
+    points = np.nan_to_num(cube.values, nan=0.0).reshape(-1, n_stats) @ stat_weights(cube.stats, scoring_settings)
+    points = np.where(has_row, points.reshape(n_players, n_weeks), np.nan)
+    df = pd.DataFrame(points, index=cube.player_ids, columns=cube.weeks)
+
+    with _points_cache_lock:
+        _points_cache.setdefault(cube, {})[key] = df
+    return df
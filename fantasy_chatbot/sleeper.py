@@ -1,8 +1,114 @@
+import asyncio
+import re
+import threading
+import time
+from functools import cache
+from collections import Counter, defaultdict
 import requests_cache
+from requests_cache import NEVER_EXPIRE
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 from typing import Union, Optional
 from pathlib import Path
 
+import config as cf
+
+BASE_URL = 'https://api.sleeper.app/v1/'
+STATS_URL = 'https://api.sleeper.com/'
+CDN_BASE_URL = 'https://sleepercdn.com/'
+GRAPHQL_URL = 'https://sleeper.com/graphql'
+
+POSITIONS_QUERY = 'season_type=regular&position[]=DEF&position[]=K&position[]=QB&position[]=RB&position[]=TE&position[]=WR&order_by=pts_ppr'
+
+# per-endpoint cache expiry (seconds), first match wins. Requests for past seasons and completed drafts never expire.
+CACHE_RULES: list[tuple[str, re.Pattern, int]] = [
+    (name, re.compile(pattern), expire_after) for name, pattern, expire_after in [
+        ('nfl_state', r'/v1/state/nfl', 60 * 5),
+        ('transactions', r'/v1/league/[^/]+/transactions/', 60 * 2),
+        ('matchups', r'/v1/league/[^/]+/matchups/', 60 * 5),
+        ('rosters', r'/v1/league/[^/]+/rosters', 60 * 5),
+        ('league_users', r'/v1/league/[^/]+/users', 60 * 60),
+        ('drafts', r'/v1/league/[^/]+/drafts', 60 * 60),
+        ('league', r'/v1/league/[^/]+$', 60 * 60),
+        ('draft_picks', r'/v1/draft/[^/]+/picks', 60 * 10),
+        ('user_leagues', r'/v1/user/[^/]+/leagues/', 60 * 60),
+        ('user', r'/v1/user/', 60 * 60 * 24),
+        ('player_stats', r'sleeper\.com/stats/nfl/player/', 60 * 30),
+        ('player_projections', r'sleeper\.com/projections/nfl/player/', 60 * 60),
+        ('weekly_stats', r'sleeper\.com/stats/nfl/\d+/\d+', 60 * 30),
+        ('weekly_projections', r'sleeper\.com/projections/nfl/\d+/\d+', 60 * 30),
+        ('season_stats', r'sleeper\.com/stats/nfl/\d+', 60 * 60),
+        ('season_projections', r'sleeper\.com/projections/nfl/\d+', 60 * 60 * 6),
+        ('avatars', r'sleepercdn\.com/avatars/', NEVER_EXPIRE),
+    ]
+]
+
+# graphql requests are all POSTs to the same URL, so they are matched by operation name
+GRAPHQL_CACHE_RULES: dict[str, int] = {
+    'get_player_news_for_ids': 30,
+    'metadata': 60 * 5,
+}
+DEFAULT_EXPIRE_AFTER = 60 * 60 * 24
+
+
+def _endpoint(url: str) -> tuple[str, int]:
+    for name, pattern, expire_after in CACHE_RULES:
+        if pattern.search(url.split('?')[0]):
+            return name, expire_after
+    return 'other', DEFAULT_EXPIRE_AFTER
+
+
+def _players_news_query(player_ids: list[Union[str, int]], limit: int) -> str:
+    # one aliased field per player, so news for many players comes back in a single request
+    fields = '\n'.join(
+        f"""            p{i}: get_player_news(sport: "nfl", player_id: "{player_id}", limit: {limit}){{
+                metadata
+                player_id
+                published
+                source
+                source_key
+                sport
+            }}""" for i, player_id in enumerate(player_ids)
+    )
+    return f"""query get_player_news_for_ids {{
+{fields}
+        }}"""
+
+
+def _news_by_player(data: dict, player_ids: list[Union[str, int]]) -> dict[str, list[dict]]:
+    return {str(player_id): data.get(f'p{i}') or [] for i, player_id in enumerate(player_ids)}
+
+
+def _league_history_query(league_id: str) -> str:
+    return f"""query metadata {{
+            metadata(type: "league_history", key: "{league_id}"){{
+                key
+                type
+                data
+                last_updated
+                created
+            }}
+        }}"""
+
+
+def _ranks_from_stats(stats: list[dict]) -> dict:
+    return {
+        p['player_id']: {
+            'rank_ppr': p['stats']['rank_ppr'],
+            'pos_rank_ppr': p['stats']['pos_rank_ppr']
+        } for p in stats
+    }
+
+
+def _merge_players(projections: list[dict], player_ranks: dict, limit: Optional[int]) -> dict:
+    if limit:
+        projections = projections[:limit]
+    return {p['player_id']: {**p['player'], **player_ranks.get(p['player_id'], {})} for p in projections}
+
+
+def _sort_standings(standings: list[dict]) -> list[dict]:
+    return sorted(standings, key=lambda x: (x['wins'], x['fpts']), reverse=True)
+
 
 class SleeperClient:
     def __init__(self, cache_path: str = '../.cache'):
@@ -12,59 +118,131 @@ class SleeperClient:
         self.session = requests_cache.CachedSession(
             Path(cache_path) / 'api_cache',
             backend='sqlite',
-            expire_after=60 * 60 * 24,
+            expire_after=DEFAULT_EXPIRE_AFTER,
+            # graphql (news, standings) is POST-only
+            allowable_methods=('GET', 'HEAD', 'POST'),
+            # expired responses are returned immediately while a (conditional) refresh runs in the background
+            stale_while_revalidate=True,
         )
+        # one bounded pool per host, shared by every thread using this client: requests over the limit wait for a
+        # free connection instead of opening more
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=cf.SLEEPER_MAX_CONNECTIONS, pool_block=True))
+        self.cache_stats: defaultdict[str, Counter] = defaultdict(Counter)
+        self._news_cache: dict[tuple[str, int], tuple[float, list[dict]]] = {}
+        self._cache_stats_lock = threading.Lock()
 
         # API URLs
-        self.base_url = 'https://api.sleeper.app/v1/'
-        self.stats_url = 'https://api.sleeper.com/'
-        self.cdn_base_url = 'https://sleepercdn.com/'
-        self.graphql_url = 'https://sleeper.com/graphql'
+        self.base_url = BASE_URL
+        self.stats_url = STATS_URL
+        self.cdn_base_url = CDN_BASE_URL
+        self.graphql_url = GRAPHQL_URL
+
+        # useful metadata - resolved lazily so constructing a client never blocks on the network
+        self._nfl_state: Optional[dict] = None
+        self._nfl_state_fetched_at = 0.0
+        self._nfl_state_lock = threading.Lock()
+        self._nfl_state_refreshing = False
+
+    @property
+    def nfl_state(self) -> dict:
+        """
+        Current NFL season/week. Fetched on first use, then refreshed every `NFL_STATE_REFRESH_INTERVAL` seconds
+        in the background while the previous value keeps being served.
+        """
+        if self._nfl_state is None:
+            with self._nfl_state_lock:
+                if self._nfl_state is None:
+                    self._nfl_state = self.get_nfl_state()
+                    self._nfl_state_fetched_at = time.monotonic()
+        elif time.monotonic() - self._nfl_state_fetched_at > cf.NFL_STATE_REFRESH_INTERVAL:
+            with self._nfl_state_lock:
+                start_refresh = not self._nfl_state_refreshing
+                self._nfl_state_refreshing = True
+            if start_refresh:
+                threading.Thread(target=self._refresh_nfl_state, daemon=True).start()
+        return self._nfl_state
+
+    def _refresh_nfl_state(self):
+        try:
+            self._nfl_state = self.get_nfl_state()
+            self._nfl_state_fetched_at = time.monotonic()
+        finally:
+            self._nfl_state_refreshing = False
+
+    def _record(self, endpoint: str, response):
+        if not getattr(response, 'from_cache', False):
+            outcome = 'miss'
+        elif getattr(response, 'is_expired', False):
+            outcome = 'revalidate'
+        else:
+            outcome = 'hit'
+        with self._cache_stats_lock:
+            self.cache_stats[endpoint][outcome] += 1
+
+    def get_cache_stats(self) -> dict[str, dict[str, int]]:
+        """Cache hit/miss/revalidate counts per endpoint"""
+        with self._cache_stats_lock:
+            return {endpoint: dict(counts) for endpoint, counts in self.cache_stats.items()}
+
+    def _season_expiry(self, season: Optional[Union[str, int]]) -> Optional[int]:
+        # data for past seasons is immutable
+        if season and int(season) < int(self.nfl_state['season']):
+            return NEVER_EXPIRE
+        return None
 
-        # useful metadata
-        self.nfl_state = self.get_nfl_state()
+    def _get(self, url: str, expire_after: Optional[int] = None):
+        endpoint, default_expire_after = _endpoint(url)
+        response = self.session.get(url, expire_after=expire_after or default_expire_after, timeout=cf.HTTP_TIMEOUT)
+        self._record(endpoint, response)
+        return response
 
-    def _get_json(self, path: str, base_url: Optional[str] = None) -> dict:
+    def _get_json(self, path: str, base_url: Optional[str] = None, expire_after: Optional[int] = None) -> dict:
         url = urljoin(base_url or self.base_url, path)
-        return self.session.get(url).json()
+        return self._get(url, expire_after).json()
 
     def _get_content(self, path: str) -> bytes:
         url = urljoin(self.cdn_base_url, path)
-        return self.session.get(url).content
+        return self._get(url).content
 
     def _graphql(self, operation_name: str, query: str, variables: Optional[dict] = None) -> dict:
-        return self.session.post(self.graphql_url, data={
+        response = self.session.post(self.graphql_url, data={
             "operationName": operation_name,
             "variables": variables or {},
             "query": query,
-        }).json()
+        }, expire_after=GRAPHQL_CACHE_RULES.get(operation_name, DEFAULT_EXPIRE_AFTER), timeout=cf.HTTP_TIMEOUT)
+        self._record(f'graphql:{operation_name}', response)
+        return response.json()
+
+    def get_season_projections(self, season: Optional[int] = None) -> list[dict]:
+        """Season-long projections for every player, sorted by projected points"""
+        return self._get_json(
+            f'projections/nfl/{season or self.nfl_state["season"]}?{POSITIONS_QUERY}',
+            base_url=self.stats_url,
+            expire_after=self._season_expiry(season)
+        )
+
+    def get_season_stats(self, season: Optional[int] = None) -> list[dict]:
+        """Season-to-date stats (including ranks) for every player"""
+        return self._get_json(
+            f'stats/nfl/{season or self.nfl_state["season"]}?{POSITIONS_QUERY}',
+            base_url=self.stats_url,
+            expire_after=self._season_expiry(season)
+        )
 
     def _get_ranks(self, season: Optional[int] = None):
-        return {
-            p['player_id']: {
-                'rank_ppr': p['stats']['rank_ppr'],
-                'pos_rank_ppr': p['stats']['pos_rank_ppr']
-            } for p in self._get_json(
-                f'stats/nfl/{season or self.nfl_state["season"]}?season_type=regular&position[]=DEF&position[]=K&position[]=QB&position[]=RB&position[]=TE&position[]=WR&order_by=pts_ppr',
-                base_url=self.stats_url
-            )}
+        return _ranks_from_stats(self.get_season_stats(season))
 
     def get_players(self, season: Optional[int] = None, limit: Optional[int] = 800) -> dict:
         """Get top N players by projected points - helps limit the universe to only the realistic players"""
-        res = self._get_json(
-            f'projections/nfl/{season or self.nfl_state["season"]}?season_type=regular&position[]=DEF&position[]=K&position[]=QB&position[]=RB&position[]=TE&position[]=WR&order_by=pts_ppr',
-            base_url=self.stats_url
-        )
+        res = self.get_season_projections(season)
         player_ranks = self._get_ranks(season or self.nfl_state['season'])
-        if limit:
-            return {p['player_id']: {**p['player'], **player_ranks.get(p['player_id'], {})} for p in res[:limit]}
-        else:
-            return {p['player_id']: {**p['player'], **player_ranks.get(p['player_id'], {})} for p in res}
+        return _merge_players(res, player_ranks, limit)
 
     def get_player_stats(self, player_id: Union[str, int], season: Optional[int] = None, group_by_week: bool = False):
         return self._get_json(
             f'stats/nfl/player/{player_id}?season_type=regular&season={season or self.nfl_state["season"]}{"&grouping=week" if group_by_week else ""}',
-            base_url=self.stats_url)
+            base_url=self.stats_url,
+            expire_after=self._season_expiry(season))
 
     def get_player(self, player_id: Union[str, int], season: Optional[int] = None):
         if player_stats := self.get_player_stats(player_id, season, group_by_week=False):
@@ -77,26 +255,39 @@ class SleeperClient:
     def get_player_projections(self, player_id: Union[str, int], season: Optional[int] = None):
         return self._get_json(
             f'projections/nfl/player/{player_id}?season_type=regular&season={season or self.nfl_state["season"]}&grouping=week',
-            base_url=self.stats_url)
+            base_url=self.stats_url,
+            expire_after=self._season_expiry(season))
 
     def get_player_news(self, player_id: Union[str, int], limit: int = 2) -> list[dict]:
-        query = f"""query get_player_news_for_ids {{
-            news: get_player_news(sport: "nfl", player_id: "{player_id}", limit: {limit}){{
-                metadata
-                player_id
-                published
-                source
-                source_key
-                sport
-            }}
-        }}"""
-        return self._graphql(operation_name='get_player_news_for_ids', query=query)['data']['news']
+        return self.get_players_news([player_id], limit=limit)[str(player_id)]
+
+    def get_players_news(self, player_ids: list[Union[str, int]], limit: int = 2) -> dict[str, list[dict]]:
+        """
+        Recent news for many players in a single GraphQL request, keyed by player_id.
+        News is cached in memory per player for `NEWS_CACHE_TTL` seconds, and only uncached players are requested.
+        """
+        now = time.monotonic()
+        news = {}
+        for player_id in dict.fromkeys(str(p) for p in player_ids):
+            cached = self._news_cache.get((player_id, limit))
+            if cached and now - cached[0] < cf.NEWS_CACHE_TTL:
+                news[player_id] = cached[1]
+
+        if missing := [str(p) for p in dict.fromkeys(player_ids) if str(p) not in news]:
+            query = _players_news_query(missing, limit)
+            fetched = _news_by_player(self._graphql(operation_name='get_player_news_for_ids', query=query)['data'], missing)
+            for player_id, player_news in fetched.items():
+                self._news_cache[(player_id, limit)] = (now, player_news)
+            news.update(fetched)
+
+        return {str(p): news[str(p)] for p in player_ids}
 
     def get_league_drafts(self, league_id: str):
         return self._get_json(f'league/{league_id}/drafts')
 
-    def get_draft_picks(self, draft_id: str):
-        return self._get_json(f'draft/{draft_id}/picks')
+    def get_draft_picks(self, draft_id: str, complete: bool = False):
+        """Picks for a draft. Picks for a `complete` draft can't change, so they are cached forever"""
+        return self._get_json(f'draft/{draft_id}/picks', expire_after=NEVER_EXPIRE if complete else None)
 
     def get_league(self, league_id: str) -> dict:
         return self._get_json(f'league/{league_id}')
@@ -109,17 +300,8 @@ class SleeperClient:
         return self._get_json(f'league/{league_id}/matchups/{week}')
 
     def get_league_standings(self, league_id: str):
-        query = f"""query metadata {{
-            metadata(type: "league_history", key: "{league_id}"){{
-                key
-                type
-                data
-                last_updated
-                created
-            }}
-        }}"""
-        return sorted(self._graphql(operation_name='metadata', query=query)['data']['metadata']['data']['standings'],
-                      key=lambda x: (x['wins'], x['fpts']), reverse=True)
+        query = _league_history_query(league_id)
+        return _sort_standings(self._graphql(operation_name='metadata', query=query)['data']['metadata']['data']['standings'])
 
     def get_league_users(self, league_id: str):
         return self._get_json(f'league/{league_id}/users')
@@ -139,14 +321,135 @@ class SleeperClient:
         return self._get_json(f'user/{user_id}')
 
     def get_leagues_for_user(self, user_id: str, season: Optional[Union[str, int]] = None, sport: str = 'nfl'):
+        expire_after = self._season_expiry(season)
         season = season or self.nfl_state['season']
-        return self._get_json(f'user/{user_id}/leagues/{sport}/{season}')
+        return self._get_json(f'user/{user_id}/leagues/{sport}/{season}', expire_after=expire_after)
 
     def get_all_weekly_projections(self, season: Optional[Union[str, int]] = None,
                                    week: Optional[Union[str, int]] = None):
+        expire_after = self._season_expiry(season)
         season = season or self.nfl_state['season']
         week = week or self.nfl_state['display_week']
         return self._get_json(
-            f'projections/nfl/{season}/{week}?season_type=regular&position[]=DEF&position[]=K&position[]=QB&position[]=RB&position[]=TE&position[]=WR&order_by=pts_ppr',
-            base_url=self.stats_url
+            f'projections/nfl/{season}/{week}?{POSITIONS_QUERY}',
+            base_url=self.stats_url,
+            expire_after=expire_after
         )
+
+    def get_all_weekly_stats(self, season: Optional[Union[str, int]] = None,
+                             week: Optional[Union[str, int]] = None):
+        """Every player's stats for one week, in one request"""
+        expire_after = self._season_expiry(season)
+        season = season or self.nfl_state['season']
+        week = week or self.nfl_state['display_week']
+        return self._get_json(
+            f'stats/nfl/{season}/{week}?{POSITIONS_QUERY}',
+            base_url=self.stats_url,
+            expire_after=expire_after
+        )
+
+
+@cache
+def default_client() -> SleeperClient:
+    """Process-wide SleeperClient, created on first use"""
+    return SleeperClient()
+
+
+class AsyncSleeperClient:
+    """
+    Asyncio counterpart of `SleeperClient` with the same method surface, for fanning out independent requests.
+
+    Every request runs on a worker thread through one SleeperClient (the process-wide one by default), so concurrent
+    fan-outs share its request cache - per-endpoint expiry, stale-while-revalidate and cache stats - and its
+    connection pool, which keeps at most SLEEPER_MAX_CONNECTIONS connections per host open for the whole process.
+    """
+
+    def __init__(self, client: Optional[SleeperClient] = None):
+        self.client = client or default_client()
+
+    async def __aenter__(self) -> 'AsyncSleeperClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def _call(self, method: str, *args, **kwargs):
+        return await asyncio.to_thread(getattr(self.client, method), *args, **kwargs)
+
+    async def get_nfl_state(self):
+        # the client's in-memory state, so concurrent callers share a single request
+        return await asyncio.to_thread(lambda: self.client.nfl_state)
+
+    async def get_season_projections(self, season: Optional[int] = None) -> list[dict]:
+        """Season-long projections for every player, sorted by projected points"""
+        return await self._call('get_season_projections', season)
+
+    async def get_season_stats(self, season: Optional[int] = None) -> list[dict]:
+        """Season-to-date stats (including ranks) for every player"""
+        return await self._call('get_season_stats', season)
+
+    async def _get_ranks(self, season: Optional[int] = None):
+        return _ranks_from_stats(await self.get_season_stats(season))
+
+    async def get_players(self, season: Optional[int] = None, limit: Optional[int] = 800) -> dict:
+        """Get top N players by projected points - helps limit the universe to only the realistic players"""
+        res, player_ranks = await asyncio.gather(self.get_season_projections(season), self._get_ranks(season))
+        return _merge_players(res, player_ranks, limit)
+
+    async def get_player_stats(self, player_id: Union[str, int], season: Optional[int] = None, group_by_week: bool = False):
+        return await self._call('get_player_stats', player_id, season, group_by_week)
+
+    async def get_player(self, player_id: Union[str, int], season: Optional[int] = None):
+        return await self._call('get_player', player_id, season)
+
+    async def get_player_projections(self, player_id: Union[str, int], season: Optional[int] = None):
+        return await self._call('get_player_projections', player_id, season)
+
+    async def get_player_news(self, player_id: Union[str, int], limit: int = 2) -> list[dict]:
+        return (await self.get_players_news([player_id], limit=limit))[str(player_id)]
+
+    async def get_players_news(self, player_ids: list[Union[str, int]], limit: int = 2) -> dict[str, list[dict]]:
+        return await self._call('get_players_news', player_ids, limit)
+
+    async def get_league_drafts(self, league_id: str):
+        return await self._call('get_league_drafts', league_id)
+
+    async def get_draft_picks(self, draft_id: str, complete: bool = False):
+        """Picks for a draft. Picks for a `complete` draft can't change, so they are cached forever"""
+        return await self._call('get_draft_picks', draft_id, complete)
+
+    async def get_league(self, league_id: str) -> dict:
+        return await self._call('get_league', league_id)
+
+    async def get_league_rosters(self, league_id: str) -> dict:
+        return await self._call('get_league_rosters', league_id)
+
+    async def get_league_matchups(self, league_id: str, week: Optional[int] = None) -> dict:
+        return await self._call('get_league_matchups', league_id, week)
+
+    async def get_league_standings(self, league_id: str):
+        return await self._call('get_league_standings', league_id)
+
+    async def get_league_users(self, league_id: str):
+        return await self._call('get_league_users', league_id)
+
+    async def get_transactions(self, league_id, week: Optional[int] = None):
+        return await self._call('get_transactions', league_id, week)
+
+    async def get_avatar(self, avatar_id: str, thumbnail: bool = True):
+        return await self._call('get_avatar', avatar_id, thumbnail)
+
+    async def get_user(self, user_id: str):
+        """user_id can either be the id or username"""
+        return await self._call('get_user', user_id)
+
+    async def get_leagues_for_user(self, user_id: str, season: Optional[Union[str, int]] = None, sport: str = 'nfl'):
+        return await self._call('get_leagues_for_user', user_id, season, sport)
+
+    async def get_all_weekly_projections(self, season: Optional[Union[str, int]] = None,
+                                         week: Optional[Union[str, int]] = None):
+        return await self._call('get_all_weekly_projections', season, week)
+
+    async def get_all_weekly_stats(self, season: Optional[Union[str, int]] = None,
+                                   week: Optional[Union[str, int]] = None):
+        return await self._call('get_all_weekly_stats', season, week)
@@ -0,0 +1,132 @@
+"""
+Versioned on-disk snapshots of the player universe and per-league indexes, so workers can start from disk instead of
+re-fetching and re-deriving everything.
+
+- player universes are Arrow IPC files. Loading skips the API requests and the JSON parsing, but the table is still
+  converted to pandas and the player name index is rebuilt
+- leagues are pickles of the already-built League indexes
+
+A snapshot that can't be read (corrupt, written by an incompatible pyarrow or pickle, unreadable) is logged and
+treated as missing, so callers fall back to the network.
+
+Pre-warm snapshots before a server takes traffic with:
+
+    python snapshot.py LEAGUE_ID [LEAGUE_ID ...] [--week WEEK]
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import pandas as pd
+
+import config as cf
+
+try:
+    import pyarrow as pa
+except ImportError:  # universe snapshots are disabled without pyarrow
+    pa = None
+
+# bump whenever the layout of a snapshot (or of the League indexes) changes
+SNAPSHOT_VERSION = 4
+
+logger = logging.getLogger(__name__)
+
+
+def universe_path(season: int, scoring: str) -> Path:
+    return Path(cf.SNAPSHOT_DIR) / f'v{SNAPSHOT_VERSION}' / f'universe-{season}-{scoring}.arrow'
+
+
+def league_path(league_id: str, week: int) -> Path:
+    return Path(cf.SNAPSHOT_DIR) / f'v{SNAPSHOT_VERSION}' / f'league-{league_id}-{week}.pkl'
+
+
+def _atomic_write(path: Path, data: bytes):
+    # write to a temp file and rename, so readers never see a partially written snapshot
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _is_fresh(created: float, max_age: Optional[float]) -> bool:
+    return max_age is None or time.time() - created < max_age
+
+
+def write_table(df: pd.DataFrame, path: Path, metadata: dict[str, Any]):
+    if pa is None or not cf.SNAPSHOTS_ENABLED:
+        return
+    table = pa.Table.from_pandas(df)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'snapshot': json.dumps({'version': SNAPSHOT_VERSION, 'created': time.time(), **metadata}).encode(),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    _atomic_write(path, sink.getvalue().to_pybytes())
+
+
+def read_table(path: Path, max_age: Optional[float] = None) -> Optional[tuple[pd.DataFrame, dict[str, Any]]]:
+    """Read a table snapshot. Returns None if it is missing, unreadable, from another snapshot version or too old"""
+    if pa is None or not cf.SNAPSHOTS_ENABLED or not path.exists():
+        return None
+    try:
+        with pa.memory_map(str(path), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        metadata = json.loads(table.schema.metadata[b'snapshot'])
+        if metadata['version'] != SNAPSHOT_VERSION or not _is_fresh(metadata['created'], max_age):
+            return None
+        return table.to_pandas(), metadata
+    except Exception:
+        logger.warning('Ignoring unreadable snapshot %s', path, exc_info=True)
+        return None
+
+
+def write_object(obj: Any, path: Path, metadata: dict[str, Any]):
+    if not cf.SNAPSHOTS_ENABLED:
+        return
+    header = {'version': SNAPSHOT_VERSION, 'created': time.time(), **metadata}
+    _atomic_write(path, pickle.dumps((header, obj), protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def read_object(path: Path, max_age: Optional[float] = None) -> Optional[tuple[Any, dict[str, Any]]]:
+    """Read an object snapshot. Returns None if it is missing, unreadable, from another snapshot version or too old"""
+    if not cf.SNAPSHOTS_ENABLED or not path.exists():
+        return None
+    try:
+        with open(path, 'rb') as f:
+            header, obj = pickle.load(f)
+    except Exception:
+        logger.warning('Ignoring unreadable snapshot %s', path, exc_info=True)
+        return None
+    if header['version'] != SNAPSHOT_VERSION or not _is_fresh(header['created'], max_age):
+        return None
+    return obj, header
+
+
+def warm(league_ids: list[str], week: Optional[int] = None):
+    from league import League
+    from sleeper import SleeperClient
+
+    client = SleeperClient()
+    for league_id in league_ids:
+        start = time.perf_counter()
+        league = League.build(league_id, client=client, week=week)
+        league.universe.save_snapshot()
+        league.save_snapshot()
+        print(f'{league_id} (week {league.week}): {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('league_ids', nargs='+')
+    parser.add_argument('--week', type=int, default=None)
+    args = parser.parse_args()
+    warm(args.league_ids, week=args.week)
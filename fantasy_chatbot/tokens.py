@@ -0,0 +1,44 @@
+import logging
+from functools import cache
+from typing import Iterable
+
+from langchain_core.messages import BaseMessage
+
+import config as cf
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a characters-per-token estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(cf.TOKEN_ENCODING)
+    except Exception:
+        # the encoding is downloaded on first use - without network access, estimate instead
+        logger.warning('Could not load the %s token encoding, estimating token counts', cf.TOKEN_ENCODING, exc_info=True)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of a string - exact with tiktoken, otherwise estimated from its length"""
+    if encoding := _encoding():
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // cf.CHARS_PER_TOKEN + 1
+
+
+def message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return ''.join(part if isinstance(part, str) else str(part.get('text', '')) for part in message.content)
+
+
+def count_message_tokens(messages: Iterable[BaseMessage]) -> int:
+    # tool call arguments count towards the prompt too
+    return sum(count_tokens(message_text(m)) + count_tokens(str(getattr(m, 'tool_calls', '') or '')) for m in messages)
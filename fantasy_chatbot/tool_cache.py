@@ -0,0 +1,88 @@
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from league import League
+import config as cf
+
+
+def normalize_args(league: League, args: dict) -> str:
+    """
+    Canonical form of a tool call's arguments: sorted keys, trimmed strings, and player names resolved to player ids
+    so e.g. "Saquon" and "saquon barkley" share one result.
+    """
+    normalized = {}
+    for k, v in sorted(args.items()):
+        if isinstance(v, str):
+            v = v.strip()
+            if k == 'player_name':
+                try:
+                    v = league.get_player_id_fuzzy_search(v)[0]
+                except KeyError:
+                    pass
+        elif isinstance(v, list) and k == 'player_names':
+            v = [normalize_args(league, {'player_name': p}) for p in v]
+        normalized[k] = v
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ToolMemo:
+    """
+    Per-conversation (thread) memo of tool results, keyed by (league snapshot version, tool name, normalized args).
+
+    Results are computed once per thread and reused across agent loop iterations, including concurrent identical
+    calls, which wait on the first one. Failed calls are not cached. Threads and entries per thread are bounded LRUs.
+    """
+
+    def __init__(self, max_threads: int = cf.TOOL_MEMO_MAX_THREADS, max_entries: int = cf.TOOL_MEMO_MAX_ENTRIES):
+        self.max_threads = max_threads
+        self.max_entries = max_entries
+        self._threads: OrderedDict[str, OrderedDict[Hashable, Future]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, league: League, name: str, args: dict) -> tuple:
+        return league.version, name, normalize_args(league, args)
+
+    def call(self, thread_id: str, league: League, name: str, args: dict, fn: Callable[..., Any]) -> Any:
+        """Return the memoized result of `fn(**args)`, computing it if this thread hasn't seen the call yet"""
+        key = self.key(league, name, args)
+
+        with self._lock:
+            entries = self._threads.get(thread_id)
+            if entries is None:
+                entries = self._threads[thread_id] = OrderedDict()
+                while len(self._threads) > self.max_threads:
+                    self._threads.popitem(last=False)
+            self._threads.move_to_end(thread_id)
+
+            future = entries.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = entries[key] = Future()
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+            else:
+                entries.move_to_end(key)
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            result = fn(**args)
+        except BaseException as e:
+            with self._lock:
+                if entries.get(key) is future:
+                    del entries[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def clear(self, thread_id: str):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+
+tool_memo = ToolMemo()
@@ -0,0 +1,79 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Literal, Optional
+
+import pandas as pd
+
+import config as cf
+from tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+OutputFormat = Literal['markdown', 'csv', 'tsv']
+
+_stats: defaultdict[str, Counter] = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def _budget(tool_name: str) -> dict:
+    return cf.TOOL_OUTPUT_BUDGETS.get(tool_name, {})
+
+
+def tool_output_format(tool_name: str) -> OutputFormat:
+    """The format `encode_table` renders a tool's tables in, unless told otherwise"""
+    return _budget(tool_name).get('format', cf.TOOL_OUTPUT_FORMAT)
+
+
+def prune_columns(df: pd.DataFrame, tool_name: str) -> pd.DataFrame:
+    """Keep only the tool's budgeted columns (in budget order) and drop columns with no values at all"""
+    if columns := _budget(tool_name).get('columns'):
+        df = df[[c for c in columns if c in df.columns]]
+    return df.dropna(axis='columns', how='all')
+
+
+def encode_table(df: pd.DataFrame, tool_name: str, output_format: Optional[OutputFormat] = None) -> str:
+    """
+    Render a tool's table for the model: markdown, or compact CSV/TSV without the padding markdown tables carry.
+
+    Rows over the tool's `max_rows` budget are cut with a note saying how many were left out, and with
+    TOOL_OUTPUT_PRUNE_COLUMNS set only the tool's budgeted, non-empty columns are kept.
+    """
+    budget = _budget(tool_name)
+    output_format = output_format or tool_output_format(tool_name)
+
+    if cf.TOOL_OUTPUT_PRUNE_COLUMNS:
+        df = prune_columns(df, tool_name)
+
+    omitted = 0
+    if (max_rows := budget.get('max_rows')) is not None and len(df) > max_rows:
+        omitted = len(df) - max_rows
+        df = df.head(max_rows)
+
+    if output_format == 'markdown':
+        text = df.to_markdown(index=False)
+    elif output_format in ('csv', 'tsv'):
+        text = df.to_csv(index=False, sep=',' if output_format == 'csv' else '\t', float_format='%g').rstrip('\n')
+    else:
+        raise ValueError(f'Unknown tool output format {output_format!r}')
+
+    if omitted:
+        text += f'\n({omitted} more rows not shown)'
+    return text
+
+
+def record_tokens(tool_name: str, text: str) -> int:
+    """Count the prompt tokens of one tool response and add them to the per-tool totals"""
+    tokens = count_tokens(text)
+    with _stats_lock:
+        _stats[tool_name]['calls'] += 1
+        _stats[tool_name]['tokens'] += tokens
+        _stats[tool_name]['max_tokens'] = max(_stats[tool_name]['max_tokens'], tokens)
+    logger.debug('%s returned %d tokens', tool_name, tokens)
+    return tokens
+
+
+def get_tool_output_stats() -> dict[str, dict[str, int]]:
+    """Calls, total and largest response tokens per tool"""
+    with _stats_lock:
+        return {tool_name: dict(counts) for tool_name, counts in _stats.items()}
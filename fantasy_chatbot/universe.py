@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from sleeper import SleeperClient, AsyncSleeperClient, default_client
+from player_index import PlayerNameIndex
+import snapshot
+import config as cf
+
+logger = logging.getLogger(__name__)
+
+PLAYER_COLUMNS = ['first_name', 'last_name', 'position', 'team', 'injury_status']
+CATEGORICAL_COLUMNS = ['position', 'team', 'injury_status']
+
+
+def players_frame(projections: list[dict], stats: list[dict], scoring: str = 'ppr') -> pd.DataFrame:
+    """
+    One row per player_id (in projected points order) with player metadata, season projected points and
+    season-to-date ranks for a scoring type, e.g. `pts_ppr`, `rank_ppr`, `pos_rank_ppr`.
+    """
+    points_col, rank_col, pos_rank_col = f'pts_{scoring}', f'rank_{scoring}', f'pos_rank_{scoring}'
+    ranks = {p['player_id']: p['stats'] for p in stats}
+    records = []
+    for p in projections:
+        player_ranks = ranks.get(p['player_id'], {})
+        records.append((
+            p['player_id'],
+            *(p['player'].get(c) for c in PLAYER_COLUMNS),
+            p['stats'].get(points_col),
+            player_ranks.get(rank_col),
+            player_ranks.get(pos_rank_col),
+        ))
+
+    df = pd.DataFrame.from_records(records, columns=['player_id', *PLAYER_COLUMNS, points_col, rank_col, pos_rank_col])
+    df = df.drop_duplicates('player_id').set_index('player_id')
+    df[[points_col, rank_col, pos_rank_col]] = df[[points_col, rank_col, pos_rank_col]].apply(pd.to_numeric, errors='coerce')
+    return df.astype({c: 'category' for c in CATEGORICAL_COLUMNS})
+
+
+class PlayerUniverse:
+    """
+    All NFL players for a (season, scoring type), shared by every league in the process.
+
+    Players are stored column-wise in `players` (indexed by player_id) together with the name index built over them.
+    After `start_background_refresh`, a daemon thread reloads the data every `refresh_interval` seconds and swaps it in
+    atomically, bumping `version`.
+    """
+
+    def __init__(self, season: int, scoring: str, players: pd.DataFrame, client: Optional[SleeperClient] = None,
+                 refresh_interval: float = cf.PLAYER_UNIVERSE_REFRESH_INTERVAL):
+        self.season = season
+        self.scoring = scoring
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.points_col, self.rank_col, self.pos_rank_col = f'pts_{scoring}', f'rank_{scoring}', f'pos_rank_{scoring}'
+        self.version = 0
+
+        self._data = self._index(players)
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _index(players: pd.DataFrame) -> tuple[pd.DataFrame, PlayerNameIndex]:
+        return players, PlayerNameIndex(zip(players.index, players[PLAYER_COLUMNS].to_dict('records')))
+
+    @classmethod
+    def load(cls, client: SleeperClient, season: Optional[int] = None, scoring: str = 'ppr') -> 'PlayerUniverse':
+        season = int(season or client.nfl_state['season'])
+        players = players_frame(client.get_season_projections(season), client.get_season_stats(season), scoring)
+        return cls(season, scoring, players, client=client)
+
+    @classmethod
+    async def aload(cls, aclient: AsyncSleeperClient, client: Optional[SleeperClient] = None,
+                    season: Optional[int] = None, scoring: str = 'ppr') -> 'PlayerUniverse':
+        season = int(season or (await aclient.get_nfl_state())['season'])
+        projections, stats = await asyncio.gather(aclient.get_season_projections(season), aclient.get_season_stats(season))
+        return cls(season, scoring, players_frame(projections, stats, scoring), client=client)
+
+    @classmethod
+    def load_snapshot(cls, season: int, scoring: str = 'ppr',
+                      client: Optional[SleeperClient] = None) -> Optional['PlayerUniverse']:
+        """Load from the on-disk snapshot if there is one newer than the refresh interval"""
+        if (res := snapshot.read_table(snapshot.universe_path(season, scoring),
+                                       max_age=cf.PLAYER_UNIVERSE_REFRESH_INTERVAL)) is None:
+            return None
+        return cls(season, scoring, res[0], client=client)
+
+    def save_snapshot(self):
+        snapshot.write_table(self.players, snapshot.universe_path(self.season, self.scoring),
+                             {'season': self.season, 'scoring': self.scoring})
+
+    @property
+    def players(self) -> pd.DataFrame:
+        return self._data[0]
+
+    @property
+    def name_index(self) -> PlayerNameIndex:
+        return self._data[1]
+
+    def get(self, player_id: str) -> Optional[dict]:
+        """A single player as a dict, or None if they are not in the universe"""
+        players = self.players
+        if player_id not in players.index:
+            return None
+        player = players.loc[player_id].astype(object)
+        # missing values (e.g. a healthy player's injury_status) come back as None, not NaN
+        return {'player_id': player_id, **player.where(player.notna(), None).to_dict()}
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.players.index
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def refresh(self):
+        client = self.client or default_client()
+        players = players_frame(client.get_season_projections(self.season), client.get_season_stats(self.season), self.scoring)
+        self._data = self._index(players)
+        self.version += 1
+        self.save_snapshot()
+
+    def start_background_refresh(self):
+        if self._refresher is None and self.refresh_interval > 0:
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True,
+                                               name=f'player-universe-{self.season}-{self.scoring}')
+            self._refresher.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # keep serving the previous data, try again next interval
+                logger.exception('Failed to refresh player universe %s/%s', self.season, self.scoring)
+
+
+_universes: dict[tuple[int, str], PlayerUniverse] = {}
+_universes_lock = threading.Lock()
+
+
+def get_player_universe(client: SleeperClient, season: Optional[int] = None, scoring: str = 'ppr') -> PlayerUniverse:
+    """Process-wide PlayerUniverse for a season/scoring type, loaded on first use"""
+    key = (int(season or client.nfl_state['season']), scoring)
+    with _universes_lock:
+        if (universe := _universes.get(key)) is None:
+            universe = PlayerUniverse.load_snapshot(*key, client=client)
+            if universe is None:
+                universe = PlayerUniverse.load(client, *key)
+                universe.save_snapshot()
+            _universes[key] = universe
+            universe.start_background_refresh()
+    return universe
+
+
+async def aget_player_universe(aclient: AsyncSleeperClient, client: Optional[SleeperClient] = None,
+                               season: Optional[int] = None, scoring: str = 'ppr') -> PlayerUniverse:
+    """Async variant of `get_player_universe` - concurrent cold loads may race, but only one universe is kept"""
+    key = (int(season or (await aclient.get_nfl_state())['season']), scoring)
+    if (universe := _universes.get(key)) is None:
+        loaded = PlayerUniverse.load_snapshot(*key, client=client)
+        if loaded is None:
+            loaded = await PlayerUniverse.aload(aclient, client, *key)
+            loaded.save_snapshot()
+        with _universes_lock:
+            universe = _universes.setdefault(key, loaded)
+        universe.start_background_refresh()
+    return universe